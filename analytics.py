@@ -0,0 +1,306 @@
+"""
+analytics.py
+
+Streaming statistics over archives of finished games. It is responsible for:
+
+ Reading game records lazily, one line at a time, from JSONL files
+  (optionally .gz / .bz2 / .xz compressed), .zip archives of JSONL/JSON
+  members, or a single saved state file.
+ Splitting the stream into fixed-size chunks and processing the chunks
+  across a process pool, with a bounded number of chunks in flight so
+  memory use does not grow with archive size.
+ Merging per-chunk aggregates into one GameStats result.
+
+A game record is the dictionary produced by GameManager.get_state():
+
+    {"current": 0, "boards": [board0, board1], "moves": [[attacker, x, y], ...]}
+
+"moves" is optional; without it the order-based statistics (shots to
+sink, first-hit latency) are skipped for that game. A line that is not
+valid JSON (e.g. the half-written last line of an archive that is still
+being appended to) or a record with off-board cells is skipped and
+counted in "skipped_records" instead of stopping the run.
+
+Run : python analytics.py games.jsonl [more.jsonl.gz ...]
+"""
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from board import GRID_SIZE
+from game_manager import SHIP_TYPES
+
+_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+# ---------------- reading ----------------
+
+def iter_lines(path: str) -> Iterator[str]:
+    """
+    Yield the raw JSON text of every game record in 'path', one at a time.
+    Nothing larger than a single record is ever held in memory.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                if name.endswith("/"):
+                    continue
+                with zf.open(name) as member:
+                    for raw in member:
+                        line = raw.decode("utf-8").strip()
+                        if line:
+                            yield line
+        return
+
+    opener = _OPENERS.get(os.path.splitext(path)[1], open)
+    with opener(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def iter_chunks(paths: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    """Group the records of all 'paths' into lists of at most chunk_size lines."""
+    chunk: List[str] = []
+    for path in paths:
+        for line in iter_lines(path):
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------------- aggregation ----------------
+
+def _index(cell) -> int:
+    """Flat grid index of an [x, y] cell; ValueError if it is not on the board."""
+    try:
+        x, y = cell
+    except (TypeError, ValueError):
+        raise ValueError(f"bad cell {cell!r}") from None
+    if type(x) is not int or type(y) is not int or not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+        raise ValueError(f"bad cell {cell!r}")
+    return y * GRID_SIZE + x
+
+
+class GameStats:
+    """
+    Mergeable aggregate over any number of games.
+
+    Grids are flat lists indexed by y * GRID_SIZE + x.
+    """
+
+    def __init__(self):
+        cells = GRID_SIZE * GRID_SIZE
+        self.games = 0
+        # Records that could not be parsed or failed the checks
+        self.skipped = 0
+        # How often each cell was hit
+        self.hit_heatmap = [0] * cells
+        # How often each cell was occupied by a ship
+        self.placement_freq = [0] * cells
+        # ship name -> [total shots from first hit to sunk, ships sunk]
+        self.shots_to_sink: Dict[str, List[int]] = {
+            name: [0, 0] for name, _, _ in SHIP_TYPES
+        }
+        # Shots an attacker needed before scoring the first hit
+        self.first_hit_total = 0
+        self.first_hit_count = 0
+
+    def add_game(self, record: dict) -> None:
+        """
+        Fold one game record into the aggregate. Raises ValueError,
+        leaving the aggregate untouched, if the record is malformed.
+        """
+        if not isinstance(record, dict):
+            raise ValueError("a record must be an object")
+
+        # Check everything first so a bad record adds nothing
+        placed = []
+        hit = []
+        owners = []
+        try:
+            for board in record.get("boards", []):
+                owner = {}
+                for ship in board.get("ships", []):
+                    if type(ship.get("size")) is not int or not isinstance(ship.get("name"), str):
+                        raise ValueError(f"bad ship {ship!r}")
+                    for cell in ship.get("coordinates", []):
+                        index = _index(cell)
+                        placed.append(index)
+                        owner[(index % GRID_SIZE, index // GRID_SIZE)] = ship
+                hit.extend(_index(cell) for cell in board.get("hits", []))
+                owners.append(owner)
+
+            moves = record.get("moves") or []
+            for move in moves:
+                attacker, x, y = move
+                if attacker not in (0, 1) or type(attacker) is not int:
+                    raise ValueError(f"bad move {move!r}")
+                _index((x, y))
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"malformed record: {e}") from None
+
+        self.games += 1
+        for index in placed:
+            self.placement_freq[index] += 1
+        for index in hit:
+            self.hit_heatmap[index] += 1
+        if moves and len(owners) == 2:
+            self._add_moves(moves, owners)
+
+    def _add_moves(self, moves: List[List[int]], owners: List[dict]) -> None:
+        # Per attacker: shots fired so far, and whether a hit has landed yet
+        shots = [0, 0]
+        got_first_hit = [False, False]
+        # id(ship) -> [shot number of first hit, hits so far]
+        progress: Dict[int, List[int]] = {}
+
+        for attacker, x, y in moves:
+            shots[attacker] += 1
+            ship = owners[1 - attacker].get((x, y))
+            if ship is None:
+                continue
+
+            if not got_first_hit[attacker]:
+                got_first_hit[attacker] = True
+                self.first_hit_total += shots[attacker] - 1
+                self.first_hit_count += 1
+
+            state = progress.setdefault(id(ship), [shots[attacker], 0])
+            state[1] += 1
+            if state[1] == ship["size"]:
+                totals = self.shots_to_sink.setdefault(ship["name"], [0, 0])
+                totals[0] += shots[attacker] - state[0] + 1
+                totals[1] += 1
+
+    def merge(self, other: "GameStats") -> "GameStats":
+        """Add another aggregate into this one and return self."""
+        self.games += other.games
+        self.skipped += other.skipped
+        for i, v in enumerate(other.hit_heatmap):
+            self.hit_heatmap[i] += v
+        for i, v in enumerate(other.placement_freq):
+            self.placement_freq[i] += v
+        for name, (total, count) in other.shots_to_sink.items():
+            mine = self.shots_to_sink.setdefault(name, [0, 0])
+            mine[0] += total
+            mine[1] += count
+        self.first_hit_total += other.first_hit_total
+        self.first_hit_count += other.first_hit_count
+        return self
+
+    def summary(self) -> dict:
+        """Return JSON-friendly results with grids as rows and averages."""
+        def rows(flat):
+            return [flat[y * GRID_SIZE:(y + 1) * GRID_SIZE] for y in range(GRID_SIZE)]
+
+        return {
+            "games": self.games,
+            "skipped_records": self.skipped,
+            "hit_heatmap": rows(self.hit_heatmap),
+            "placement_frequency": rows(self.placement_freq),
+            "avg_shots_to_sink": {
+                name: (total / count if count else None)
+                for name, (total, count) in self.shots_to_sink.items()
+            },
+            "avg_first_hit_latency": (
+                self.first_hit_total / self.first_hit_count
+                if self.first_hit_count else None
+            ),
+        }
+
+
+def process_chunk(lines: List[str]) -> GameStats:
+    """
+    Worker entry point: parse and aggregate one chunk of records.
+    Bad records are counted in stats.skipped rather than raised, so one
+    truncated line cannot stop the whole run.
+    """
+    stats = GameStats()
+    for line in lines:
+        try:
+            stats.add_game(json.loads(line))
+        except ValueError:
+            # json.JSONDecodeError is a ValueError too
+            stats.skipped += 1
+    return stats
+
+
+def analyse(
+    paths: Iterable[str],
+    chunk_size: int = 500,
+    workers: Optional[int] = None,
+) -> GameStats:
+    """
+    Aggregate every record in 'paths'.
+
+    At most 2 * workers chunks are queued at once, so memory stays
+    constant no matter how large the archives are. workers=0 runs
+    everything in the current process.
+    """
+    total = GameStats()
+    chunks = iter_chunks(paths, chunk_size)
+
+    if workers == 0:
+        for chunk in chunks:
+            total.merge(process_chunk(chunk))
+        return total
+
+    with Pool(workers) as pool:
+        window = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(process_chunk, (chunk,)))
+            if len(pending) >= window:
+                total.merge(pending.popleft().get())
+        while pending:
+            total.merge(pending.popleft().get())
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Battleship game-record analytics")
+    parser.add_argument("paths", nargs="+", help="JSONL / compressed / zip archives")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size (0 = no pool, default = CPU count)")
+    parser.add_argument("--out", help="write the summary JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    stats = analyse(args.paths, args.chunk_size, args.workers)
+    elapsed = time.perf_counter() - started
+
+    text = json.dumps(stats.summary(), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    rate = stats.games / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {stats.games} games in {elapsed:.2f}s ({rate:.0f} games/s)"
+          + (f", skipped {stats.skipped} bad records" if stats.skipped else ""),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
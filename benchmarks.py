@@ -0,0 +1,349 @@
+"""
+benchmarks.py
+
+Micro-benchmarks for the game engine. Nothing here is used by the game
+itself.
+
+Run : python benchmarks.py [name ...]      (no names = run everything)
+"""
+import gc
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from board import Board, GRID_SIZE, line_coords, _CELLS
+from ship import Ship
+from game_manager import GameManager, SHIP_TYPES, CLASSIC, SALVO
+from state_loader import load_state
+from rng import StreamRandom
+
+
+def _timeit(fn: Callable[[], object], number: int) -> float:
+    """Return microseconds per call of fn."""
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - started) / number * 1e6
+
+
+def _random_game(rng: random.Random, shots: int) -> GameManager:
+    """A game with random fleets and 'shots' random attacks on each board."""
+    gm = GameManager(seed=rng.getrandbits(64))
+    gm.place_all_ships_random(0)
+    gm.place_all_ships_random(1)
+    cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)]
+    for board in gm.boards:
+        board.register_salvo(rng.sample(cells, shots))
+    gm.current = rng.randrange(2)
+    return gm
+
+
+# ---------------- zobrist ----------------
+
+class _UnhashedBoard(Board):
+    """
+    Board.place_ship / _shoot (behind register_attack) with the Zobrist
+    updates taken out, as the reference for what the hashing adds.
+    """
+
+    def place_ship(self, ship: Ship, start, end) -> bool:
+        coords = line_coords(start, end, ship.size)
+        if coords is None:
+            return False
+        if not self.segment_free(coords[0], coords[-1]):
+            return False
+        ship.place(coords)
+        self.ships.append(ship)
+        self._index_ship(len(self.ships) - 1, coords)
+        self.ships_left += not ship.is_sunk()
+        return True
+
+    def _shoot(self, pos) -> str:
+        if pos in self.hits or pos in self.misses:
+            return "repeat"
+        index = self.owner.get(pos)
+        if index is not None:
+            ship = self.ships[index]
+            ship.hit(*pos)
+            self.hits.add(pos)
+            if ship.is_sunk():
+                self.ships_left -= 1
+                return f"sunk:{ship.name}:{ship.symbol}"
+            return "hit"
+        if pos not in _CELLS:
+            return "invalid"
+        self.misses.add(pos)
+        return "miss"
+
+
+def bench_zobrist_update(fleets: int = 2000) -> None:
+    """
+    What the incremental hash adds to place_ship and register_attack,
+    against the same methods without it, and the cost of a state key
+    vs. serializing the state.
+    """
+    rng = random.Random(1)
+    layouts = []
+    for _ in range(fleets):
+        board = _random_game(rng, 0).boards[0]
+        layouts.append([(s.name, s.size, s.symbol, s.coordinates[0], s.coordinates[-1])
+                        for s in board.ships])
+    cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)]
+    orders = [rng.sample(cells, len(cells)) for _ in range(fleets)]
+
+    def run(board_type) -> tuple:
+        # Place every fleet, then fire at every cell of it
+        boards = [board_type() for _ in range(fleets)]
+        ships = [[(Ship(n, size, sym), start, end) for n, size, sym, start, end in layout]
+                 for layout in layouts]
+        gc.disable()
+        started = time.perf_counter()
+        for board, fleet in zip(boards, ships):
+            for ship, start, end in fleet:
+                board.place_ship(ship, start, end)
+        placed = time.perf_counter()
+        for board, order in zip(boards, orders):
+            for x, y in order:
+                board.register_attack(x, y)
+        done = time.perf_counter()
+        gc.enable()
+        return ((placed - started) / (fleets * len(SHIP_TYPES)) * 1e6,
+                (done - placed) / (fleets * len(cells)) * 1e6)
+
+    # Warm up (fills the key tables), then best of 5 alternating runs
+    run(Board)
+    best = {_UnhashedBoard: (float("inf"),) * 2, Board: (float("inf"),) * 2}
+    for _ in range(5):
+        for board_type in best:
+            best[board_type] = tuple(map(min, best[board_type], run(board_type)))
+    (place0, attack0), (place1, attack1) = best[_UnhashedBoard], best[Board]
+    gm = _random_game(random.Random(1), 30)
+
+    print(f"place_ship, no hash (ref)      {place0:8.3f} us")
+    print(f"place_ship, with hash          {place1:8.3f} us  (+{place1 - place0:.3f} us)")
+    print(f"register_attack, no hash (ref) {attack0:8.3f} us")
+    print(f"register_attack, with hash     {attack1:8.3f} us  (+{attack1 - attack0:.3f} us)")
+    print("GameManager.state_key()        "
+          f"{_timeit(gm.state_key, 200000):8.3f} us")
+    print("json.dumps(get_state()) (ref)  "
+          f"{_timeit(lambda: json.dumps(gm.get_state()), 5000):8.3f} us")
+
+
+def bench_zobrist_collisions(games: int = 20000) -> None:
+    """
+    Hash many random positions and count keys shared by different positions.
+    The 32-bit column shows the rate a shorter key would give.
+    """
+    rng = random.Random(2)
+    seen64: Dict[int, str] = {}
+    seen32: Dict[int, str] = {}
+    collisions64 = collisions32 = 0
+    distinct = 0
+
+    for _ in range(games):
+        gm = _random_game(rng, rng.randrange(0, 60))
+        exact = json.dumps(
+            [gm.current]
+            + [[sorted((s.symbol, tuple(s.coordinates)) for s in b.ships),
+                sorted(b.hits), sorted(b.misses)] for b in gm.boards]
+        )
+        key = gm.state_key()
+        if seen64.get(key, exact) != exact:
+            collisions64 += 1
+        elif key not in seen64:
+            distinct += 1
+        seen64.setdefault(key, exact)
+
+        short = key & 0xFFFFFFFF
+        if seen32.get(short, exact) != exact:
+            collisions32 += 1
+        seen32.setdefault(short, exact)
+
+    print(f"positions hashed {games}, distinct {distinct}")
+    print(f"64-bit collisions {collisions64} ({collisions64 / games:.2e})")
+    print(f"32-bit collisions {collisions32} ({collisions32 / games:.2e})")
+
+
+# ---------------- salvo ----------------
+
+def bench_salvo(rounds: int = 2000) -> None:
+    """
+    One salvo vs. the same shots one at a time, on the board alone and
+    through GameManager (which adds the salvo-limit check).
+    """
+    rng = random.Random(3)
+    cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)]
+    salvos = [rng.sample(cells, 5) for _ in range(rounds)]
+    templates = [_random_game(rng, 0) for _ in range(rounds)]
+    states = [gm.get_state() for gm in templates]
+
+    def fresh() -> List[GameManager]:
+        games = []
+        for state in states:
+            gm = GameManager(mode="salvo", seed=0)
+            gm.boards = [Board.load_data(bd) for bd in state["boards"]]
+            games.append(gm)
+        return games
+
+    def board_loop(games):
+        for gm, shots in zip(games, salvos):
+            board = gm.boards[1]
+            for x, y in shots:
+                board.register_attack(x, y)
+
+    def board_batch(games):
+        for gm, shots in zip(games, salvos):
+            gm.boards[1].register_salvo(shots)
+
+    def gm_loop(games):
+        for gm, shots in zip(games, salvos):
+            for x, y in shots:
+                gm.attack(0, x, y)
+
+    def gm_batch(games):
+        for gm, shots in zip(games, salvos):
+            gm.attack_salvo(0, shots)
+
+    variants = {
+        "Board.register_attack() x5": board_loop,
+        "Board.register_salvo()": board_batch,
+        "GameManager.attack() x5": gm_loop,
+        "GameManager.attack_salvo()": gm_batch,
+    }
+
+    # Best of 9 alternating runs on fresh games, collector off while timing
+    best = dict.fromkeys(variants, float("inf"))
+    for _ in range(9):
+        for label, fn in variants.items():
+            games = fresh()
+            gc.disable()
+            started = time.perf_counter()
+            fn(games)
+            best[label] = min(best[label], (time.perf_counter() - started) / rounds * 1e6)
+            gc.enable()
+
+    labels = list(variants)
+    for loop, batch in (labels[:2], labels[2:]):
+        print(f"{loop:<28}{best[loop]:8.3f} us")
+        print(f"{batch:<28}{best[batch]:8.3f} us  ({best[loop] / best[batch]:.2f}x)")
+
+
+# ---------------- loading ----------------
+
+def _check_by_replay(data: dict) -> None:
+    """
+    How a save could be checked without state_loader: load it eagerly,
+    then replay every ship through place_ship on a fresh Board and
+    compare the hits.
+    """
+    for bd in data["boards"]:
+        board = Board.load_data(bd)
+        fresh = Board()
+        for ship in board.ships:
+            copy = Ship(ship.name, ship.size, ship.symbol)
+            if not fresh.place_ship(copy, ship.coordinates[0], ship.coordinates[-1]):
+                raise ValueError("bad ship")
+            if not ship.hits <= set(ship.coordinates) or not ship.hits <= board.hits:
+                raise ValueError("bad hits")
+
+
+def bench_load(saves: int = 2000) -> None:
+    """
+    Bulk-load saved games: eager Board.load_data (no validation), eager
+    load plus a replay check, and the validating state_loader with lazy
+    ships.
+    """
+    rng = random.Random(4)
+    texts = [json.dumps(_random_game(rng, rng.randrange(0, 60)).get_state())
+             for _ in range(saves)]
+    datas = [json.loads(t) for t in texts]
+
+    def per_save(fn) -> float:
+        started = time.perf_counter()
+        for data in datas:
+            fn(data)
+        return (time.perf_counter() - started) / saves * 1e6
+
+    started = time.perf_counter()
+    for text in texts:
+        json.loads(text)
+    parse = (time.perf_counter() - started) / saves * 1e6
+    eager = per_save(lambda data: [Board.load_data(bd) for bd in data["boards"]])
+    replay = per_save(_check_by_replay)
+    lazy = per_save(lambda data: load_state(data, SHIP_TYPES, (CLASSIC, SALVO)))
+
+    print(f"json.loads only (ref)            {parse:8.3f} us")
+    print(f"Board.load_data x2 (no checks)   {eager:8.3f} us")
+    print(f"load_data + replay check         {replay:8.3f} us")
+    print(f"state_loader (validated, lazy)   {lazy:8.3f} us  "
+          f"({replay / lazy:.2f}x vs replay check)")
+
+
+# ---------------- rng ----------------
+
+def _place_fleet_global(board: Board) -> None:
+    """GameManager._place_fleet_random as it was with the global random module."""
+    for name, size, sym in SHIP_TYPES:
+        placed = False
+        tries = 0
+        while not placed and tries < 1000:
+            tries += 1
+            orient = random.choice(["H", "V"])
+            x = random.randint(0, GRID_SIZE - 1)
+            y = random.randint(0, GRID_SIZE - 1)
+            if orient == "H":
+                end = (x + size - 1, y)
+            else:
+                end = (x, y + size - 1)
+            placed = board.place_ship(Ship(name, size, sym), (x, y), end)
+
+
+def bench_rng(fleets: int = 2000) -> None:
+    """Random fleet placement: per-game streams vs. the global random module."""
+    gm = GameManager(seed=5)
+    random.seed(5)
+    variants = {"global random": _place_fleet_global, "StreamRandom": gm._place_fleet_random}
+
+    # Best of 5 alternating runs, with the collector off while timing
+    best = dict.fromkeys(variants, float("inf"))
+    for _ in range(5):
+        for label, place in variants.items():
+            boards = [Board() for _ in range(fleets)]
+            gc.disable()
+            started = time.perf_counter()
+            for board in boards:
+                place(board)
+            best[label] = min(best[label], (time.perf_counter() - started) / fleets * 1e6)
+            gc.enable()
+
+    for label, elapsed in best.items():
+        print(f"fleet placement, {label:<16}{elapsed:8.3f} us")
+    stream = StreamRandom(5)
+    words = _timeit(stream.next64, 200000)
+    print(f"StreamRandom.next64()            {words:8.3f} us")
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "zobrist_update": bench_zobrist_update,
+    "zobrist_collisions": bench_zobrist_collisions,
+    "salvo": bench_salvo,
+    "load": bench_load,
+    "rng": bench_rng,
+}
+
+
+def main(argv: List[str]) -> int:
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"unknown benchmark {name!r}; choose from {', '.join(BENCHMARKS)}")
+            return 1
+        print(f"== {name}")
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -13,70 +13,214 @@ in the game. It is responsible for:
 The Board itself does not know whose turn it is or which player is
 attacking; that logic lives in GameManager.
 """
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 from ship import Ship
+import zobrist
 
 GRID_SIZE = 10
 
+# Every cell of the board, for one-lookup bounds checks
+_CELLS = frozenset((x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE))
+
+
+def column_label(x: int) -> str:
+    """Spreadsheet-style name of column x: A..Z, then AA, AB, ..."""
+    label = ""
+    x += 1
+    while x:
+        x, rem = divmod(x - 1, 26)
+        label = chr(ord("A") + rem) + label
+    return label
+
+
+def line_coords(
+    start: Tuple[int, int], end: Tuple[int, int], size: int
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Return the cells from start to end (inclusive) for a ship of 'size',
+    or None if the line is diagonal or has the wrong length.
+    Bounds and overlaps are checked by the caller.
+    """
+    x1, y1 = start
+    x2, y2 = end
+
+    # If both x and y change, that's a diagonal placement
+    if x1 != x2 and y1 != y2:
+        return None
+
+    coords = []
+    if x1 == x2:  # vertical
+        if y2 >= y1:
+            step = 1
+        else:
+            step = -1
+        # Decide the direction of movement in y:
+        # - If y2 >= y1, we are going "down" (step = +1).
+        # - If y2 <  y1, we are going "up"  (step = -1).
+        length = abs(y2 - y1) + 1
+        if length != size:
+            return None
+        # Build the list of all coordinates the ship will occupy
+        # from y1 to y2 (inclusive), using the chosen step direction.
+        for y in range(y1, y2 + step, step):
+            coords.append((x1, y))
+    else:  # horizontal
+        if x2 >= x1:
+            step = 1
+        else:
+            step = -1
+        length = abs(x2 - x1) + 1
+        if length != size:
+            return None
+        for x in range(x1, x2 + step, step):
+            coords.append((x, y1))
+    return coords
+
+
 class Board:
     def __init__(self):
         # initialises an Empty board
+        # Raw ship dicts from a save file, turned into Ship objects the
+        # first time self.ships is used (see the ships property).
+        self._ship_data: Optional[List[dict]] = None
         self.ships: List[Ship] = []
         # Set of coordinates (x, y) that were attacked and hit a ship.
         # Using a set allows fast membership checks (x, y) in self.hits.
         self.hits = set()   
         self.misses = set() 
+        # Zobrist hash of the ships, hits and misses on this board.
+        # Kept up to date incrementally by place_ship/register_attack.
+        self.zhash = 0
+        # Occupancy index: (x, y) -> position of the owning ship in
+        # self.ships, plus per-row / per-column prefix counts of occupied
+        # cells so any straight segment can be checked in O(1).
+        # The prefix counts are None until first needed (see build_prefix).
+        self.owner = {}
+        # Number of ships not sunk yet, kept in step with self.ships so
+        # salvo_size / all_sunk never have to walk the fleet.
+        self.ships_left = 0
+        self._row_prefix: Optional[List[List[int]]] = None
+        self._col_prefix: Optional[List[List[int]]] = None
+
+    @property
+    def ships(self) -> List[Ship]:
+        if self._ship_data is not None:
+            self._ships = [Ship.load_data(sd) for sd in self._ship_data]
+            self._ship_data = None
+        return self._ships
+
+    @ships.setter
+    def ships(self, ships: List[Ship]) -> None:
+        self._ships = ships
+        self._ship_data = None
 
     def place_ship(self, ship: Ship, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
-        x1, y1 = start
-        x2, y2 = end
-        
-         # If both x and y change, that's a diagonal placement
-        if x1 != x2 and y1 != y2:
+        coords = line_coords(start, end, ship.size)
+        if coords is None:
             return False
 
-        coords = []
-        if x1 == x2:  # vertical
-            if y2 >= y1:
-                step = 1
-            else:
-                step = -1
-            # Decide the direction of movement in y:
-            # - If y2 >= y1, we are going "down" (step = +1).
-            # - If y2 <  y1, we are going "up"  (step = -1).
-            length = abs(y2 - y1) + 1
-            if length != ship.size:
-                return False
-             # Build the list of all coordinates the ship will occupy
-            # from y1 to y2 (inclusive), using the chosen step direction.
-            for y in range(y1, y2 + step, step):
-                coords.append((x1, y))
-        else:  # horizontal
-            if x2 >= x1:
-                step = 1
-            else:
-                step = -1
-            length = abs(x2 - x1) + 1
-            if length != ship.size:
-                return False
-            for x in range(x1, x2 + step, step):
-                coords.append((x, y1))
-
         # check board limits & overlapping
-        for (x, y) in coords:
-            if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
-                return False
-            # 2 Check that no coordinate overlaps any existing ship cell
-            for s in self.ships:
-                if (x, y) in s.coordinates:
-                    return False
+        if not self.segment_free(coords[0], coords[-1]):
+            return False
         # If we reach this point, the placement is valid
         # Tell the ship object to store its coordinates internally.
         ship.place(coords)
         # Add this ship to the list of ships on the board.
         self.ships.append(ship)
+        self._index_ship(len(self.ships) - 1, coords)
+        self.ships_left += not ship.is_sunk()
+        self.zhash ^= zobrist.ship_hash(ship.symbol, coords)
         return True
 
+    def segment_free(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """
+        True if the straight segment start..end is inside the board and
+        touches no ship. O(1) using the prefix counts.
+        """
+        x1, y1 = start
+        x2, y2 = end
+        if x1 > x2:
+            x1, x2 = x2, x1
+        if y1 > y2:
+            y1, y2 = y2, y1
+        if x1 < 0 or y1 < 0 or x2 >= GRID_SIZE or y2 >= GRID_SIZE:
+            return False
+        if self._row_prefix is None:
+            self.build_prefix()
+        if y1 == y2:
+            row = self._row_prefix[y1]
+            return row[x2 + 1] == row[x1]
+        if x1 == x2:
+            col = self._col_prefix[x1]
+            return col[y2 + 1] == col[y1]
+        return False
+
+    def legal_ends(self, start: Tuple[int, int], size: int) -> List[Tuple[int, int]]:
+        """
+        Every end cell that makes a legal placement for a ship of 'size'
+        starting at 'start' (at most four, one per direction).
+        """
+        x, y = start
+        ends = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            end = (x + dx * (size - 1), y + dy * (size - 1))
+            if end not in ends and self.segment_free(start, end):
+                ends.append(end)
+        return ends
+
+    def _index_ship(self, index: int, coords) -> None:
+        # Record the ship's cells and refresh the prefix counts of every
+        # row and column it touches.
+        if self._row_prefix is None:
+            self.build_prefix()
+        rows = set()
+        cols = set()
+        for x, y in coords:
+            self.owner[(x, y)] = index
+            rows.add(y)
+            cols.add(x)
+        for y in rows:
+            prefix = self._row_prefix[y]
+            for x in range(GRID_SIZE):
+                prefix[x + 1] = prefix[x] + ((x, y) in self.owner)
+        for x in cols:
+            prefix = self._col_prefix[x]
+            for y in range(GRID_SIZE):
+                prefix[y + 1] = prefix[y] + ((x, y) in self.owner)
+
+    def reindex(self) -> None:
+        """
+        Rebuild the occupancy index and Zobrist hash after ships, hits
+        or misses were assigned directly (e.g. when loading).
+        """
+        self.owner = {}
+        self.ships_left = 0
+        for index, ship in enumerate(self.ships):
+            for c in ship.coordinates:
+                self.owner[tuple(c)] = index
+            self.ships_left += not ship.is_sunk()
+        self._row_prefix = self._col_prefix = None
+        self.rehash()
+
+    def build_prefix(self) -> None:
+        """
+        Rebuild the row/column prefix counts from self.owner. Called
+        lazily, so loading a game in progress never pays for it.
+        """
+        owner = self.owner
+        self._row_prefix = []
+        for y in range(GRID_SIZE):
+            prefix = [0] * (GRID_SIZE + 1)
+            for x in range(GRID_SIZE):
+                prefix[x + 1] = prefix[x] + ((x, y) in owner)
+            self._row_prefix.append(prefix)
+        self._col_prefix = []
+        for x in range(GRID_SIZE):
+            prefix = [0] * (GRID_SIZE + 1)
+            for y in range(GRID_SIZE):
+                prefix[y + 1] = prefix[y] + ((x, y) in owner)
+            self._col_prefix.append(prefix)
+
     # For random placement
     def placeRandomly(self, ship: Ship, start_x: int, start_y: int, horizontal: bool) -> bool:
         if horizontal:
@@ -86,27 +230,79 @@ class Board:
         return self.place_ship(ship, (start_x, start_y), end)
 
     def register_attack(self, x: int, y: int) -> str:
-        pos = (x, y)
+        """
+        Fire one shot. Returns "hit", "miss", "sunk:<name>:<symbol>",
+        "repeat" for a cell already fired at, or "invalid" for a cell
+        off the board (neither of those two changes the board).
+        """
+        return self._shoot((x, y))
+
+    def _shoot(self, pos: Tuple[int, int]) -> str:
+        # The one place a shot is resolved; register_attack and
+        # register_salvo both come through here.
 
         # prevent repeating a previous attack
         if pos in self.hits or pos in self.misses:
             return "repeat"
 
         # check if hit a ship
-        for ship in self.ships:
-            if ship.occupies(pos):
-                ship.register_hit(pos)
-                self.hits.add(pos)
-                if ship.is_sunk():
-                    return f"sunk:{ship.name}:{ship.symbol}"
-                return "hit"
+        index = self.owner.get(pos)
+        if index is not None:
+            ship = self.ships[index]
+            ship.hit(*pos)
+            self.hits.add(pos)
+            self.zhash ^= zobrist.HIT_KEYS[pos]
+            if ship.is_sunk():
+                self.ships_left -= 1
+                return f"sunk:{ship.name}:{ship.symbol}"
+            return "hit"
+
+        if pos not in _CELLS:
+            return "invalid"
 
         # otherwise miss
         self.misses.add(pos)
+        self.zhash ^= zobrist.MISS_KEYS[pos]
         return "miss"
 
+    def register_salvo(self, shots: Sequence[Tuple[int, int]]) -> Tuple[List[str], List[str]]:
+        """
+        Resolve several (x, y) shots in order. Returns (results, sunk):
+        one register_attack result per shot (a cell fired at twice in
+        the same salvo is a "repeat" the second time) and the names of
+        the ships this salvo sank.
+        """
+        shoot = self._shoot
+        results = []
+        sunk = []
+        for pos in shots:
+            result = shoot(pos)
+            results.append(result)
+            if result[0] == "s":
+                sunk.append(result.split(":")[1])
+        return results, sunk
+
+    def ships_afloat(self) -> int:
+        """Number of ships not sunk yet."""
+        return self.ships_left
+
+    def rehash(self) -> int:
+        """
+        Recompute the Zobrist hash from scratch.
+        Needed only when ships/hits/misses were set directly.
+        """
+        h = 0
+        for s in self.ships:
+            h ^= zobrist.ship_hash(s.symbol, s.coordinates)
+        for pos in self.hits:
+            h ^= zobrist.HIT_KEYS[pos]
+        for pos in self.misses:
+            h ^= zobrist.MISS_KEYS[pos]
+        self.zhash = h
+        return h
+
     def all_sunk(self) -> bool:
-        return all(s.is_sunk() for s in self.ships)
+        return self.ships_left == 0
 
     # Saving for JSON
     def save_data(self) -> dict:
@@ -126,4 +322,5 @@ class Board:
         board.ships = [Ship.load_data(sd) for sd in data.get("ships", [])]
         board.hits = set(tuple(p) for p in data.get("hits", []))
         board.misses = set(tuple(p) for p in data.get("misses", []))
+        board.reindex()
         return board
\ No newline at end of file
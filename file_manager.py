@@ -31,6 +31,15 @@ class FileManager:
         with open(self.state_filename, "w") as f:
             json.dump(state, f)
 
+    def append_record(self, path: str, record: Dict[str, Any]) -> None:
+        """
+        Append one finished game as a single JSON line.
+        The archive can be read back lazily by analytics.py.
+        """
+        with open(path, "a") as f:
+            f.write(json.dumps(record))
+            f.write("\n")
+
     def load_state(self) -> Optional[Dict[str, Any]]:
         """
         Load game state from JSON file.
@@ -9,8 +9,12 @@ Saves & loads game state using FileManager
 from board import Board, GRID_SIZE
 from ship import Ship
 from file_manager import FileManager
-import random
-from typing import Tuple, List, Optional
+from snapshot import BoardSnapshot
+from opponent_model import OpponentModelStore, least_exposed
+from state_loader import load_state
+import zobrist
+from rng import StreamRandom, new_seed
+from typing import Tuple, List, Optional, Sequence
 # All types of ships used in the game
 SHIP_TYPES = [
     ("Carrier", 5, "C"),
@@ -19,18 +23,61 @@ SHIP_TYPES = [
     ("Submarine", 3, "S"),
     ("Destroyer", 2, "D"),
 ]
+
+# Game variants: one shot per turn, or one shot per surviving ship
+CLASSIC = "classic"
+SALVO = "salvo"
+
+# Random layouts compared when an opponent model is available
+LAYOUT_CANDIDATES = 16
+
+# Outcomes of one random placement try: orientation x start cell
+_PLACEMENT_TRIES = 2 * GRID_SIZE * GRID_SIZE
+
 class GameManager:
     
     #Keeps track of everything related to gameplay logic.
     
 
-    def __init__(self):
+    def __init__(
+        self,
+        mode: str = CLASSIC,
+        models: Optional[OpponentModelStore] = None,
+        seed: Optional[int] = None,
+        game_id: int = 0,
+        shards: int = 1,
+    ):
         # Each player has their own Board
         self.boards = [Board(), Board()]
 
         # Player index whose turn it currently is (0 or 1)
         self.current = 0
 
+        # Ordered list of shots fired as [attacker, x, y]; kept so a
+        # finished game can be archived and replayed by analytics.py
+        self.moves: List[List[int]] = []
+
+        # CLASSIC or SALVO
+        self.mode = mode
+
+        # Optional per-opponent shot statistics; only used once players
+        # have names (see set_players)
+        self.models = models
+        self.player_names: List[Optional[str]] = [None, None]
+        # Shots each player has fired this game (for shot order)
+        self.shots_fired = [0, 0]
+
+        # This game's own random stream, derived from (seed, game_id).
+        # Games with different ids never share draws, so parallel shards
+        # are reproducible; the stream is saved with the state.
+        # With N shards on one seed, shard k starts at game_id k and
+        # reset() steps by N, so shards play k, k + N, k + 2N, ... and
+        # never reuse each other's ids.
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.shards = shards
+        self.rng = StreamRandom(new_seed() if seed is None else seed, game_id)
+
         # Handles saving/loading files
         self.fm = FileManager()
 
@@ -40,11 +87,12 @@ class GameManager:
         Save the entire game state to JSON:
         - current player's turn
         - both boards (ships, hits, misses)
+        - the ordered list of moves
         """
-        state = {
-            "current": self.current,
-            "boards": [b.save_data() for b in self.boards],
-        }
+        state = self.get_state()
+
+        # Write-behind: a save is a good moment to persist the models too
+        self.flush_models()
 
         # If no custom file path, save to the default file
         if path is None:
@@ -54,31 +102,118 @@ class GameManager:
             self.fm.save_state_to(path, state)
 
 
+    def get_state(self) -> dict:
+        """Return the JSON-friendly game state (also used as a game record)."""
+        return {
+            "current": self.current,
+            "mode": self.mode,
+            "boards": [b.save_data() for b in self.boards],
+            "moves": [list(m) for m in self.moves],
+            "rng": self.rng.save_data(),
+            "players": list(self.player_names),
+        }
+
+
+    def save_record(self, path: str = "battleship_games.jsonl"):
+        """Append the current game as one line of a JSONL archive."""
+        self.fm.append_record(path, self.get_state())
+
+
     def load_state(self):
         """
         Load game state from JSON file and rebuild boards.
         Returns None if no save file exists.
+        Raises state_loader.StateError if the file is corrupt; the
+        current game is left untouched in that case.
         """
         data = self.fm.load_state()
         if data is None:
             return None
 
-        # Restore whose turn it is
-        self.current = data.get("current", 0)
+        # Validate everything before changing any of our own state
+        loaded = load_state(data, SHIP_TYPES, (CLASSIC, SALVO))
 
-        # Rebuild both boards from saved data
-        self.boards = [Board.load_data(bd) for bd in data.get("boards", [])]
+        # Restore whose turn it is
+        self.current = loaded.current
+        self.mode = loaded.mode or CLASSIC
+
+        # Boards come back with their ships materialized on first use
+        self.boards = loaded.boards
+        self.moves = loaded.moves
+        if loaded.rng is not None:
+            self.rng = StreamRandom.load_data(loaded.rng)
+        # A resumed game keeps feeding the same models; its game was
+        # already started (and counted) before it was saved
+        self.player_names = list(loaded.players)
+        self.shots_fired = [0, 0]
+        for attacker, _, _ in self.moves:
+            self.shots_fired[attacker] += 1
 
         return data
 
 
+    def set_players(self, name1: Optional[str], name2: Optional[str]):
+        """
+        Name both players so their shots can be learned by the opponent
+        model store (None for a player who should not be learned).
+        Takes effect from the next reset(), which starts a game for
+        each named player's model.
+        """
+        self.player_names = [name1, name2]
+
+    def flush_models(self):
+        """Write every changed opponent model to disk (e.g. on exit)."""
+        if self.models is not None:
+            self.models.flush()
+
+    def _start_models(self):
+        if self.models is None:
+            return
+        for name in self.player_names:
+            if name is not None:
+                self.models.start_game(name)
+
+    def _record_shot(self, attacker: int, x: int, y: int):
+        # Feed one valid shot to the move log and the opponent model
+        self.moves.append([attacker, x, y])
+        name = self.player_names[attacker]
+        if self.models is not None and name is not None:
+            self.models.record_shot(name, x, y, self.shots_fired[attacker])
+        self.shots_fired[attacker] += 1
+
+
     def place_all_ships_random(self, player: int):
         """
         Randomly place all ships for the given player.
+        If the opponent has a learned model, several random layouts are
+        drawn and the one the opponent is least likely to hit early wins.
+        """
+        opponent = self.player_names[1 - player]
+        model = None
+        if self.models is not None and opponent is not None:
+            model = self.models.get(opponent)
+
+        # A model with no finished games carries no information
+        if model is None or model.games <= 1:
+            self._place_fleet_random(self.boards[player])
+            return
+
+        layouts = []
+        for _ in range(LAYOUT_CANDIDATES):
+            board = Board()
+            self._place_fleet_random(board)
+            layouts.append(board)
+        best = least_exposed(model, [[s.coordinates for s in b.ships] for b in layouts])
+        self.boards[player] = layouts[best]
+
+
+    def _place_fleet_random(self, board: Board):
+        """
+        Place every ship of SHIP_TYPES at random on 'board'.
         Makes many attempts until valid placement is found.
         """
-        board = self.boards[player]
-
+        # Each word of the game's stream is cut into three tries
+        draws = []
         for name, size, sym in SHIP_TYPES:
             placed = False
             tries = 0
@@ -87,15 +222,14 @@ class GameManager:
             while not placed and tries < 1000:
                 tries += 1
 
-                # Random orientation
-                orient = random.choice(["H", "V"])
-
-                # Random starting cell
-                x = random.randint(0, GRID_SIZE - 1)
-                y = random.randint(0, GRID_SIZE - 1)
+                # Random orientation and starting cell from one draw
+                if not draws:
+                    draws = self.rng.split(_PLACEMENT_TRIES, _PLACEMENT_TRIES, _PLACEMENT_TRIES)
+                cell, horizontal = divmod(draws.pop(), 2)
+                y, x = divmod(cell, GRID_SIZE)
 
                 # Compute end cell based on orientation
-                if orient == "H":
+                if horizontal:
                     end = (x + size - 1, y)
                 else:
                     end = (x, y + size - 1)
@@ -131,22 +265,75 @@ class GameManager:
         return False  # Should not happen unless name is wrong
 
 
+    def register_attack(self, defender: int, x: int, y: int) -> str:
+        """
+        Fire one shot at the defender's board WITHOUT switching turns
+        (the GUI switches when the device is passed).
+        """
+        result = self.boards[defender].register_attack(x, y)
+        if result != "repeat" and result != "invalid":
+            self._record_shot(1 - defender, x, y)
+        return result
+
+
     def attack(self, attacker: int, x: int, y: int) -> str:
         """
         The attacker shoots at (x, y) on the defender's board.
-        Returns result string: hit, miss, sunk, sunk_all, repeat.
+        Returns result string: hit, miss, sunk, sunk_all, repeat, invalid.
         """
         defender = 1 - attacker  # Switch player index (if 0 then 1 & if 1 then 0)
 
-        result = self.boards[defender].receive_attack(x, y)
+        result = self.register_attack(defender, x, y)
 
-        # If the move was valid (not repeat), turn switches to defender
-        if result != "repeat":
+        # If the move was valid (not repeat/invalid), turn switches to defender
+        if result != "repeat" and result != "invalid":
             self.current = defender
 
         return result
 
 
+    def salvo_size(self, attacker: int) -> int:
+        """Shots the attacker may fire this turn (1 in classic mode)."""
+        if self.mode == SALVO:
+            return self.boards[attacker].ships_left
+        return 1
+
+
+    def register_salvo(self, defender: int, shots: Sequence[Tuple[int, int]]) -> dict:
+        """
+        Resolve a whole salvo against the defender's board in one pass,
+        WITHOUT switching turns. Returns
+            {"results": [one result per shot], "sunk": [ship names]}
+        Raises ValueError if more shots are given than salvo_size allows.
+        """
+        attacker = 1 - defender
+        limit = self.salvo_size(attacker)
+        if len(shots) > limit:
+            raise ValueError(
+                f"Player {attacker + 1} may fire at most {limit} shots this turn."
+            )
+
+        results, sunk = self.boards[defender].register_salvo(shots)
+        record = self._record_shot
+        for (x, y), result in zip(shots, results):
+            if result != "repeat" and result != "invalid":
+                record(attacker, x, y)
+        return {"results": results, "sunk": sunk}
+
+
+    def attack_salvo(self, attacker: int, shots: Sequence[Tuple[int, int]]) -> dict:
+        """
+        Batch version of attack(): resolve every shot, then switch the
+        turn once if at least one shot was valid.
+        """
+        defender = 1 - attacker
+        moves_before = len(self.moves)
+        outcome = self.register_salvo(defender, shots)
+        if len(self.moves) > moves_before:
+            self.current = defender
+        return outcome
+
+
     def all_sunk(self, player: int) -> bool:
         """Check if all ships of a player are destroyed."""
         return self.boards[player].all_sunk()
@@ -156,9 +343,37 @@ class GameManager:
         """Return the board belonging to a player."""
         return self.boards[player]
 
-    def reset(self):
-        """Reset the game: new empty boards, set turn to Player 1."""
+    def state_key(self) -> int:
+        """
+        64-bit Zobrist key of the whole game (both boards and whose turn
+        it is). O(1): it combines the hashes the boards already keep.
+        """
+        return zobrist.combine(self.boards[0].zhash, self.boards[1].zhash, self.current)
+
+    def snapshot(self, player: int) -> BoardSnapshot:
+        """Return an immutable copy of a player's board (for undo or lookahead)."""
+        return BoardSnapshot.from_board(self.boards[player])
+
+    def restore(self, player: int, snap: BoardSnapshot):
+        """Replace a player's board with the given snapshot."""
+        self.boards[player] = snap.to_board()
+
+    def reset(self, mode: str = CLASSIC, game_id: Optional[int] = None):
+        """
+        Reset the game: new empty boards, set turn to Player 1.
+        The new game gets this shard's next game id (the current one plus
+        'shards'), or 'game_id' if given, under the same master seed and
+        therefore a fresh random stream.
+        """
+        if game_id is None:
+            game_id = self.rng.game_id + self.shards
+        self.rng.reseed(self.rng.master_seed, game_id)
         self.boards = [Board(), Board()]
         self.current = 0
-# Global instance used by the GUI
-gm = GameManager()
+        self.moves = []
+        self.mode = mode
+        self.shots_fired = [0, 0]
+        self._start_models()
+# Global instance used by the GUI and the terminal frontend; it learns
+# named opponents in ./opponent_models
+gm = GameManager(models=OpponentModelStore())
@@ -1,8 +1,11 @@
+import os
 import tkinter as tk
-from tkinter import messagebox
-from board import Board, GRID_SIZE
+from tkinter import messagebox, simpledialog
+from board import Board, GRID_SIZE, column_label
 from ship import Ship
-from game_manager import gm
+from game_manager import gm, CLASSIC, SALVO
+from snapshot import History, ShipSnapshot
+from profiler import profiler_from_env, GUI_HANDLERS
 
 SHIP_TYPES = [("Carrier",5,"C"),("Battleship",4,"B"),("Cruiser",3,"R"),("Submarine",3,"S"),("Destroyer",2,"D")]
 
@@ -25,7 +28,7 @@ class BattleshipGUI:
     CELL_SIZE = 36
     PADDING = 56   
 
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
         self.root.title("Battleship (Arctic Fleet)")
         self.root.configure(bg=BG_COLOR)
@@ -33,12 +36,25 @@ class BattleshipGUI:
         # Using the game manager file for game logic and file IO
         # GUI-local state:
         self.has_attacked = False
+        # Cells queued for the next salvo (salvo mode only)
+        self.salvo_queue = []
 
         self.placing_player = 0
         self.placement_mode = None
         self.manual_ship_index = 0
         self.manual_stage = 0
         self.manual_start = None
+        self.manual_ends = []
+        self.manual_history = None
+
+        # Wrap the handlers before any widget is built, so buttons that
+        # hold a bound method (e.g. Load previous game) get the wrapped one
+        if profiler is not None:
+            profiler.instrument(self, GUI_HANDLERS)
+            # Dialogs wait on the player, not on the handler that opened them
+            profiler.exclude(messagebox, ("showinfo", "showerror", "askyesno"))
+            profiler.exclude(simpledialog, ("askstring",))
+            profiler.exclude(tk.Misc, ("wait_window",))
 
         self.build_main_menu()
 
@@ -62,6 +78,11 @@ class BattleshipGUI:
                   bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
                   font=(None, BUTTON_FONT_SIZE)).pack(pady=8)
 
+        tk.Button(frame, text="Start Salvo Game", width=28,
+                  command=lambda: self.start_new_game(SALVO),
+                  bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
+                  font=(None, BUTTON_FONT_SIZE)).pack(pady=8)
+
         tk.Button(frame, text="Quit", width=28,
                   command=self.root.quit,
                   bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
@@ -105,20 +126,41 @@ class BattleshipGUI:
         return overlay
 
     def load_previous(self):
-        data = gm.load_state()
-        if data is None:
-            messagebox.showinfo("Load", "No saved game found.")
-            return
-
         try:
+            data = gm.load_state()
+            if data is None:
+                messagebox.showinfo("Load", "No saved game found.")
+                return
+
             # gm.load_state already populated gm.boards and gm.current
             messagebox.showinfo("Load", "Game loaded.")
             self.show_turn_screen()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load saved game: {e}")
 
-    def start_new_game(self):
-        gm.reset()
+    def ask_player_names(self):
+        """
+        Ask both players for a name so the opponent model can learn
+        their shots. A blank name plays anonymously; Cancel returns None.
+        """
+        names = []
+        for p in range(2):
+            previous = gm.player_names[p]
+            name = simpledialog.askstring(
+                "Players",
+                f"Player {p+1} name (leave blank to play without learning):",
+                initialvalue=previous or "", parent=self.root)
+            if name is None:
+                return None
+            names.append(name.strip() or None)
+        return names
+
+    def start_new_game(self, mode=CLASSIC):
+        names = self.ask_player_names()
+        if names is None:
+            return
+        gm.set_players(*names)
+        gm.reset(mode)
         self.placing_player = 0
         self.show_placement_choice()
 
@@ -151,7 +193,7 @@ class BattleshipGUI:
                   font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=1, padx=8)
 
     def do_random_setup(self, p):
-        gm.random_setup(p)
+        gm.place_all_ships_random(p)
         messagebox.showinfo("Placement", f"Player {p+1} ships placed.")
         self.next_after_placement()
 
@@ -161,6 +203,7 @@ class BattleshipGUI:
         self.manual_ship_index = 0
         self.manual_stage = 0
         self.manual_start = None
+        self.manual_history = History(gm.snapshot(p))
         self.show_manual_placement()
 
     def show_manual_placement(self):
@@ -198,9 +241,39 @@ class BattleshipGUI:
         canvas.bind("<Button-1>", lambda ev: self.manual_canvas_click(ev, canvas))
         self.draw_board_on_canvas(canvas, board, show_ships=True)
 
-        tk.Button(frame, text="Cancel", command=self.show_placement_choice,
+        ctrl = tk.Frame(frame, bg=BG_COLOR)
+        ctrl.pack(pady=8)
+
+        tk.Button(ctrl, text="Undo", command=self.manual_undo,
+                  state="normal" if self.manual_history.can_undo() else "disabled",
                   bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
-                  font=(None, BUTTON_FONT_SIZE)).pack(pady=8)
+                  font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=0, padx=8)
+        tk.Button(ctrl, text="Redo", command=self.manual_redo,
+                  state="normal" if self.manual_history.can_redo() else "disabled",
+                  bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
+                  font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=1, padx=8)
+        tk.Button(ctrl, text="Cancel", command=self.show_placement_choice,
+                  bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
+                  font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=2, padx=8)
+
+    def manual_undo(self):
+        snap = self.manual_history.undo()
+        if snap is not None:
+            self.restore_manual_snapshot(snap)
+
+    def manual_redo(self):
+        snap = self.manual_history.redo()
+        if snap is not None:
+            self.restore_manual_snapshot(snap)
+
+    def restore_manual_snapshot(self, snap):
+        # Ships are placed in SHIP_TYPES order, so the number of ships
+        # on the board tells us which ship to place next.
+        gm.restore(self.placing_player, snap)
+        self.manual_ship_index = len(snap.ships)
+        self.manual_stage = 0
+        self.manual_start = None
+        self.show_manual_placement()
 
     def manual_canvas_click(self, ev, canvas):
         padding = self.PADDING
@@ -210,19 +283,36 @@ class BattleshipGUI:
         if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
             return
 
+        ship_name, ship_size, ship_sym = SHIP_TYPES[self.manual_ship_index]
+        board = gm.get_board(self.placing_player)
+
         if self.manual_stage == 0:
+            # Ask the board which end cells are legal from here and
+            # highlight them, so the player never has to guess.
+            ends = board.legal_ends((x, y), ship_size)
+            if not ends:
+                messagebox.showerror("Invalid", f"The {ship_name} does not fit from that cell.")
+                return
             self.manual_start = (x, y)
+            self.manual_ends = ends
             self.manual_stage = 1
-            self.draw_board_on_canvas(canvas, gm.get_board(self.placing_player),
-                                      show_ships=True, highlight_start=self.manual_start)
+            self.draw_board_on_canvas(canvas, board, show_ships=True,
+                                      highlight_start=self.manual_start,
+                                      highlight_ends=ends)
             return
 
         start = self.manual_start
         end = (x, y)
 
-        ship_name, ship_size, ship_sym = SHIP_TYPES[self.manual_ship_index]
+        if end == start and end not in self.manual_ends:
+            # Clicking the start cell again deselects it
+            self.manual_stage = 0
+            self.manual_start = None
+            self.draw_board_on_canvas(canvas, board, show_ships=True)
+            return
 
-        placed = gm.place_ship_manual(self.placing_player, ship_name, start, end)
+        placed = end in self.manual_ends and gm.place_ship_manual(
+            self.placing_player, ship_name, start, end)
         if not placed:
             messagebox.showerror("Invalid", "Invalid placement. Try again.")
             self.manual_stage = 0
@@ -231,6 +321,10 @@ class BattleshipGUI:
             return
 
         self.draw_board_on_canvas(canvas, gm.get_board(self.placing_player), show_ships=True)
+        # Advance the history from its current version, so the new
+        # snapshot shares everything but the ship's owner rows with it
+        self.manual_history.push(self.manual_history.current.place(
+            ShipSnapshot(ship_name, ship_size, ship_sym, ()), start, end))
 
         self.manual_ship_index += 1
         self.manual_stage = 0
@@ -257,6 +351,7 @@ class BattleshipGUI:
 
     def show_turn_screen(self):
         self.has_attacked = False
+        self.salvo_queue = []
 
         for w in self.root.winfo_children():
             w.destroy()
@@ -301,6 +396,16 @@ class BattleshipGUI:
         ctrl = tk.Frame(frame, bg=BG_COLOR)
         ctrl.pack(pady=10)
 
+        if gm.mode == SALVO:
+            self.salvo_label = tk.Label(frame, font=(None, INSTR_FONT_SIZE),
+                                        fg=TEXT_COLOR, bg=BG_COLOR)
+            self.salvo_label.pack(before=ctrl)
+            self.update_salvo_label()
+            tk.Button(ctrl, text="Fire Salvo",
+                      command=lambda: self.fire_salvo(opp_canvas),
+                      bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
+                      font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=2, padx=8)
+
         tk.Button(ctrl, text="Save and Quit", command=self.save_and_quit,
                   bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
                   font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=0, padx=8)
@@ -308,7 +413,8 @@ class BattleshipGUI:
                   bg=BG_COLOR, fg=TEXT_COLOR, activebackground="#002233",
                   font=(None, BUTTON_FONT_SIZE)).grid(row=0, column=1, padx=8)
 
-    def draw_board_on_canvas(self, canvas, board, show_ships=False, highlight_start=None):
+    def draw_board_on_canvas(self, canvas, board, show_ships=False, highlight_start=None,
+                             highlight_ends=None, queued=None):
         canvas.delete("all")
         padding = self.PADDING
 
@@ -351,12 +457,18 @@ class BattleshipGUI:
                 if highlight_start and pos == highlight_start:
                     canvas.create_rectangle(x1+2, y1+2, x2-2, y2-2,
                                             outline='red', width=3)
+                elif highlight_ends and pos in highlight_ends:
+                    canvas.create_rectangle(x1+2, y1+2, x2-2, y2-2,
+                                            outline='#00FF66', width=3)
+                elif queued and pos in queued:
+                    canvas.create_rectangle(x1+2, y1+2, x2-2, y2-2,
+                                            outline='#FFCC00', width=3)
 
         top_offset = max(12, GRID_LABEL_FONT_SIZE // 2 + 6)
         left_offset = max(14, GRID_LABEL_FONT_SIZE // 2 + 8)
 
         for i in range(GRID_SIZE):
-            letter = chr(ord('A') + i)
+            letter = column_label(i)
             canvas.create_text(
                 padding + i*self.CELL_SIZE + self.CELL_SIZE/2,
                 padding - top_offset,
@@ -386,6 +498,11 @@ class BattleshipGUI:
             return
 
         defender = 1 - gm.current
+
+        if gm.mode == SALVO:
+            self.toggle_salvo_cell(opp_canvas, defender, (x, y))
+            return
+
         result = gm.register_attack(defender, x, y)
 
         if result == "repeat":
@@ -409,8 +526,54 @@ class BattleshipGUI:
 
         victor = self.check_victory()
         if victor:
-            messagebox.showinfo("Game Over", f"Player {victor} wins!")
-            self.build_main_menu()
+            self.end_game(victor)
+
+    def toggle_salvo_cell(self, opp_canvas, defender, pos):
+        board = gm.get_board(defender)
+        if pos in board.hits or pos in board.misses:
+            messagebox.showinfo("Info", "Already attacked there.")
+            return
+
+        if pos in self.salvo_queue:
+            self.salvo_queue.remove(pos)
+        elif len(self.salvo_queue) < gm.salvo_size(gm.current):
+            self.salvo_queue.append(pos)
+        else:
+            messagebox.showinfo("Info", "No shots left this turn. Fire the salvo.")
+            return
+
+        self.update_salvo_label()
+        self.draw_board_on_canvas(opp_canvas, board, show_ships=False, queued=self.salvo_queue)
+
+    def update_salvo_label(self):
+        self.salvo_label.config(
+            text=f"Shots queued: {len(self.salvo_queue)} / {gm.salvo_size(gm.current)}")
+
+    def fire_salvo(self, opp_canvas):
+        if self.has_attacked:
+            return
+        if not self.salvo_queue:
+            messagebox.showinfo("Info", "Click cells on the opponent view to queue shots.")
+            return
+
+        defender = 1 - gm.current
+        outcome = gm.register_salvo(defender, self.salvo_queue)
+        results = outcome["results"]
+
+        hits = sum(1 for r in results if r == "hit" or r.startswith("sunk:"))
+        lines = [f"{hits} hit(s), {results.count('miss')} miss(es)."]
+        for name in outcome["sunk"]:
+            lines.append(f"You sunk the enemy {name}!")
+        messagebox.showinfo("Salvo", "\n".join(lines))
+
+        self.has_attacked = True
+        self.salvo_queue = []
+        self.update_salvo_label()
+        self.draw_board_on_canvas(opp_canvas, gm.get_board(defender), show_ships=False)
+
+        victor = self.check_victory()
+        if victor:
+            self.end_game(victor)
 
     def pass_device(self):
         if not self.has_attacked:
@@ -423,6 +586,12 @@ class BattleshipGUI:
         overlay.wait_window()
         self.show_turn_screen()
 
+    def end_game(self, victor):
+        # Archive the finished game for analytics.py, then back to the menu
+        gm.save_record()
+        messagebox.showinfo("Game Over", f"Player {victor} wins!")
+        self.build_main_menu()
+
     def check_victory(self):
         if gm.all_sunk(0):
             return 2
@@ -437,5 +606,13 @@ class BattleshipGUI:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = BattleshipGUI(root)
-    root.mainloop()
\ No newline at end of file
+    # Opt-in profiling: BATTLESHIP_PROFILE=<prefix> python main.py
+    profiler = profiler_from_env()
+    app = BattleshipGUI(root, profiler)
+
+    root.mainloop()
+    gm.flush_models()
+
+    if profiler:
+        profiler.stop()
+        profiler.save(os.environ["BATTLESHIP_PROFILE"])
\ No newline at end of file
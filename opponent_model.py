@@ -0,0 +1,165 @@
+"""
+opponent_model.py
+
+Learns where each opponent tends to fire, so random placement can keep
+ships away from the cells they usually try first. It is responsible for:
+
+ OpponentModel: per-cell heat for one opponent. Every shot adds a weight
+  that is larger the earlier in the game it was fired, and older games
+  fade out by DECAY per game. Both updates are O(1): instead of scaling
+  every cell at the start of a game, new weights are scaled up and the
+  grid is renormalised only when the scale grows too large.
+ OpponentModelStore: models kept in memory with LRU eviction across
+  opponents and a write-behind cache on disk (one JSON file per
+  opponent, named by a digest of the name). Recording a shot never
+  touches the disk: changed models are written when evicted, on
+  flush(), or every FLUSH_EVERY game starts, i.e. between games rather
+  than in the middle of a move.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from board import GRID_SIZE
+
+# How much one game counts compared to the next one
+DECAY = 0.9
+# Weight of the k-th shot of a game is EARLY ** k
+EARLY = 0.95
+# Renormalise the heat grid when the scale passes this
+_MAX_SCALE = 1e100
+
+
+class OpponentModel:
+    def __init__(self, name: str):
+        self.name = name
+        self.games = 0
+        # Heat values are stored multiplied by 'scale'
+        self.heat = [0.0] * (GRID_SIZE * GRID_SIZE)
+        self.scale = 1.0
+
+    def start_game(self) -> None:
+        """Age every earlier game by DECAY (O(1) by raising the scale)."""
+        self.games += 1
+        self.scale /= DECAY
+        if self.scale > _MAX_SCALE:
+            self.heat = [h / self.scale for h in self.heat]
+            self.scale = 1.0
+
+    def record_shot(self, x: int, y: int, order: int) -> None:
+        """Add one shot; 'order' is 0 for the opponent's first shot of the game."""
+        self.heat[y * GRID_SIZE + x] += self.scale * EARLY ** order
+
+    def exposure(self, coordinates: Iterable[Tuple[int, int]]) -> float:
+        """Expected early-fire weight on the given cells (unscaled)."""
+        heat = self.heat
+        total = 0.0
+        for x, y in coordinates:
+            total += heat[y * GRID_SIZE + x]
+        return total / self.scale
+
+    def save_data(self) -> dict:
+        return {
+            "name": self.name,
+            "games": self.games,
+            "heat": [h / self.scale for h in self.heat],
+        }
+
+    @staticmethod
+    def load_data(data: dict) -> "OpponentModel":
+        model = OpponentModel(data["name"])
+        model.games = data.get("games", 0)
+        heat = data.get("heat", [])
+        if len(heat) == GRID_SIZE * GRID_SIZE:
+            model.heat = [float(h) for h in heat]
+        return model
+
+
+class OpponentModelStore:
+    """LRU cache of OpponentModel objects backed by a directory of JSON files."""
+
+    # Game starts between automatic flushes
+    FLUSH_EVERY = 10
+
+    def __init__(self, directory: str = "opponent_models", capacity: int = 64):
+        self.directory = directory
+        self.capacity = capacity
+        self._models: "OrderedDict[str, OpponentModel]" = OrderedDict()
+        self._dirty = set()
+        self._pending = 0
+
+    def _path(self, name: str) -> str:
+        # A digest rather than a cleaned-up name, so "Al ice" and "Al_ice"
+        # never end up sharing one file
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, name: str) -> OpponentModel:
+        """Return the model for 'name', loading or creating it if needed. O(1)."""
+        model = self._models.get(name)
+        if model is not None:
+            self._models.move_to_end(name)
+            return model
+
+        try:
+            with open(self._path(name), "r") as f:
+                model = OpponentModel.load_data(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError):
+            model = OpponentModel(name)
+        # The requested name is the key; a file that belongs to someone
+        # else is ignored rather than renaming the cache entry
+        if model.name != name:
+            model = OpponentModel(name)
+
+        self._models[name] = model
+        if len(self._models) > self.capacity:
+            old_name, old = self._models.popitem(last=False)
+            if old_name in self._dirty:
+                self._write(old)
+        return model
+
+    def start_game(self, name: str) -> None:
+        self.get(name).start_game()
+        self._dirty.add(name)
+        self._pending += 1
+        if self._pending >= self.FLUSH_EVERY:
+            self.flush()
+
+    def record_shot(self, name: str, x: int, y: int, order: int) -> None:
+        # On the move path: memory only, written later by flush()
+        self.get(name).record_shot(x, y, order)
+        self._dirty.add(name)
+
+    def _write(self, model: OpponentModel) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(model.name)
+        # Write to a temp file first so a crash never leaves half a model
+        with open(path + ".tmp", "w") as f:
+            json.dump(model.save_data(), f)
+        os.replace(path + ".tmp", path)
+        self._dirty.discard(model.name)
+
+    def flush(self) -> None:
+        """Write every changed model that is still in memory."""
+        for name in list(self._dirty):
+            model = self._models.get(name)
+            if model is not None:
+                self._write(model)
+        self._dirty.clear()
+        self._pending = 0
+
+
+def least_exposed(model: OpponentModel, layouts: List[List[List[Tuple[int, int]]]]) -> int:
+    """
+    Index of the layout (a list of ship coordinate lists) whose cells
+    the opponent is least likely to fire at early.
+    """
+    best = 0
+    best_score: Optional[float] = None
+    for i, layout in enumerate(layouts):
+        score = sum(model.exposure(coords) for coords in layout)
+        if best_score is None or score < best_score:
+            best, best_score = i, score
+    return best
@@ -0,0 +1,269 @@
+"""
+profiler.py
+
+Opt-in sampling profiler for GUI event handlers and headless games.
+It is responsible for:
+
+ Wrapping handlers (e.g. BattleshipGUI.attack_click) so every call's
+  latency is recorded and the sampler knows which handler is running.
+ Excluding blocking calls (message boxes, wait_window) that a handler
+  makes: while one is open the handler's clock is stopped and the
+  sampler treats the thread as idle, so time spent waiting on the user
+  is not reported as handler latency.
+ A background thread that wakes every 'interval' seconds and, while a
+  wrapped handler is running, records the stack of the thread running
+  it. Outside handlers it records nothing, so an idle GUI costs almost
+  nothing.
+ Writing the samples in collapsed-stack format ("a;b;c 12" per line),
+  which flamegraph.pl, speedscope and inferno read directly, plus a
+  per-handler latency report with p50/p99.
+
+Frames are named "file.py:function", so time spent in rendering (main.py),
+game logic (board.py, game_manager.py) and file I/O (file_manager.py,
+json) can be told apart.
+
+GUI      : BATTLESHIP_PROFILE=prof python main.py   -> prof.collapsed, prof.txt
+Headless : python profiler.py --games 500 --out prof
+Sharded  : python profiler.py --seed 7 --shard K --shards N  (one per K)
+"""
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from board import GRID_SIZE
+
+# Handlers of BattleshipGUI worth profiling
+GUI_HANDLERS = (
+    "attack_click",
+    "manual_canvas_click",
+    "show_turn_screen",
+    "show_manual_placement",
+    "draw_board_on_canvas",
+    "load_previous",
+    "save_and_quit",
+)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Profiler:
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        # handler name -> call durations in seconds
+        self.latencies: Dict[str, List[float]] = {}
+        # collapsed stack -> number of samples
+        self.samples: Counter = Counter()
+        # thread id -> stack of handler names currently running there
+        self._active: Dict[int, List[str]] = {}
+        # thread id -> total seconds spent inside excluded calls
+        self._paused: Dict[int, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------------- wrapping ----------------
+
+    def wrap(self, fn: Callable, name: str) -> Callable:
+        """Return fn wrapped so its calls are timed and sampled as 'name'."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tid = threading.get_ident()
+            running = self._active.setdefault(tid, [])
+            running.append(name)
+            paused = self._paused.get(tid, 0.0)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                elapsed -= self._paused.get(tid, 0.0) - paused
+                self.latencies.setdefault(name, []).append(elapsed)
+                running.pop()
+
+        return wrapper
+
+    def exclude_call(self, fn: Callable) -> Callable:
+        """
+        Return fn wrapped so the time it blocks is left out of whichever
+        handlers are running on this thread, and not sampled either.
+        """
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tid = threading.get_ident()
+            # The sampler sees an empty stack until the call returns
+            running = self._active.get(tid)
+            self._active[tid] = []
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._paused[tid] = self._paused.get(tid, 0.0) + time.perf_counter() - started
+                if running is not None:
+                    self._active[tid] = running
+                else:
+                    del self._active[tid]
+
+        return wrapper
+
+    def instrument(self, obj, names: Iterable[str]) -> None:
+        """Replace the named methods on one object with wrapped versions."""
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self.wrap(method, name))
+
+    def exclude(self, obj, names: Iterable[str]) -> None:
+        """
+        Replace the named functions on a module or class (e.g. the
+        tkinter.messagebox dialogs) with versions wrapped by exclude_call.
+        """
+        for name in names:
+            fn = getattr(obj, name, None)
+            if fn is not None:
+                setattr(obj, name, self.exclude_call(fn))
+
+    # ---------------- sampling ----------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid, running in list(self._active.items()):
+                # The handler can return (and pop) at any moment; a slice
+                # never raises, so an empty one just means "idle"
+                handler = running[-1:]
+                frame = frames.get(tid)
+                if handler and frame is not None:
+                    self.samples[self._collapse(handler[0], frame)] += 1
+
+    @staticmethod
+    def _collapse(handler: str, frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        names.append(handler)
+        names.reverse()
+        return ";".join(names)
+
+    # ---------------- output ----------------
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def report(self) -> str:
+        lines = [f"{'handler':<24}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            lines.append(
+                f"{name:<24}{len(values):>8}"
+                f"{percentile(values, 50) * 1e3:>10.2f}"
+                f"{percentile(values, 99) * 1e3:>10.2f}"
+                f"{values[-1] * 1e3:>10.2f}"
+            )
+        lines.append(f"samples: {sum(self.samples.values())}")
+        return "\n".join(lines)
+
+    def save(self, prefix: str) -> None:
+        """Write <prefix>.collapsed and <prefix>.txt."""
+        self.write_collapsed(prefix + ".collapsed")
+        with open(prefix + ".txt", "w") as f:
+            f.write(self.report() + "\n")
+
+
+def profiler_from_env() -> Optional[Profiler]:
+    """A started Profiler if BATTLESHIP_PROFILE is set, else None."""
+    if not os.environ.get("BATTLESHIP_PROFILE"):
+        return None
+    profiler = Profiler()
+    profiler.start()
+    return profiler
+
+
+# ---------------- headless runs ----------------
+
+def play_random_game(gm) -> None:
+    """One full game between two random shooters."""
+    gm.reset()
+    gm.place_all_ships_random(0)
+    gm.place_all_ships_random(1)
+    cells = [[(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)] for _ in range(2)]
+    for c in cells:
+        gm.rng.shuffle(c)
+    while not gm.all_sunk(0) and not gm.all_sunk(1):
+        x, y = cells[gm.current].pop()
+        gm.attack(gm.current, x, y)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from game_manager import GameManager
+    from file_manager import FileManager
+
+    parser = argparse.ArgumentParser(description="Profile headless Battleship games")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--save-every", type=int, default=0,
+                        help="also save/load the state every N games (file I/O)")
+    parser.add_argument("--out", default="profile", help="output file prefix")
+    parser.add_argument("--record", metavar="PATH",
+                        help="also append every finished game to this JSONL archive")
+    parser.add_argument("--seed", type=int, help="master seed (random if omitted)")
+    parser.add_argument("--shard", type=int, default=0,
+                        help="index of this run when splitting games across processes")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="number of processes sharing --seed")
+    args = parser.parse_args(argv)
+    if not 0 <= args.shard < args.shards:
+        parser.error("--shard must be in [0, --shards)")
+
+    profiler = Profiler()
+    gm = GameManager(seed=args.seed, game_id=args.shard, shards=args.shards)
+    # Keep profiling saves away from the real save file
+    gm.fm = FileManager(state_filename=args.out + ".state.json")
+    play = profiler.wrap(play_random_game, "headless_game")
+    save = profiler.wrap(gm.save_state, "save_state")
+    load = profiler.wrap(gm.load_state, "load_state")
+    record = profiler.wrap(gm.save_record, "save_record")
+
+    profiler.start()
+    for i in range(args.games):
+        play(gm)
+        if args.record:
+            record(args.record)
+        if args.save_every and (i + 1) % args.save_every == 0:
+            save()
+            load()
+    profiler.stop()
+
+    profiler.save(args.out)
+    print(profiler.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+rng.py
+
+Reproducible, independent random streams, one per game.
+
+StreamRandom is a counter-based generator: the n-th 64-bit word of a
+stream is a pure function of (key, n), where the key is derived from a
+master seed and a game id. Words come in blocks of BATCH: block b is
+SHAKE-128(key + b) read out as BATCH little-endian words, all produced
+in C by hashlib. So:
+
+ Two games with different ids (or seeds) get unrelated streams that can
+  never overlap, however many draws each makes, which keeps parallel
+  shards independent of each other and of process scheduling.
+ Jumping ahead is free: the state is just (seed, game_id, counter), so a
+  saved game can resume its stream exactly or be replayed from draw 0.
+ A whole block costs one hashlib call, so individual draws on hot
+  paths (random placement) are mostly a list pop.
+
+StreamRandom subclasses random.Random, so randint, choice, shuffle, ...
+all work and draw from the stream.
+"""
+import array
+import hashlib
+import random
+import sys
+from typing import List
+
+from zobrist import MASK64
+
+# Words generated per refill (one block of the stream)
+BATCH = 256
+
+
+def stream_key(seed: int, game_id: int) -> bytes:
+    """16-byte key of the stream of (seed, game_id)."""
+    return hashlib.blake2b(f"{seed}:{game_id}".encode(), digest_size=16).digest()
+
+
+class StreamRandom(random.Random):
+    def __init__(self, seed: int = 0, game_id: int = 0, counter: int = 0):
+        self._buffer: List[int] = []
+        self._end = 0
+        super().__init__()
+        self.reseed(seed, game_id, counter)
+
+    def reseed(self, seed: int, game_id: int, counter: int = 0) -> None:
+        """Switch to the stream of (seed, game_id), positioned at 'counter'."""
+        self.master_seed = seed
+        self.game_id = game_id
+        self._key = stream_key(seed, game_id)
+        # Stream index one past the last word of the current batch
+        self._end = counter
+        # Unused words of the current batch, last one next (so pop() is cheap)
+        self._buffer = []
+
+    # random.Random calls seed() from its constructor; streams are set
+    # with reseed() instead, so this only accepts the constructor's call.
+    def seed(self, a=None, version=2) -> None:
+        if a is not None:
+            self.reseed(a, 0)
+
+    @property
+    def counter(self) -> int:
+        """Number of 64-bit words drawn from the stream so far."""
+        return self._end - len(self._buffer)
+
+    def _refill(self) -> None:
+        # Load the rest of the block holding the next word; a restored
+        # counter may point into the middle of a block.
+        block, offset = divmod(self.counter, BATCH)
+        data = hashlib.shake_128(self._key + block.to_bytes(8, "little")).digest(8 * BATCH)
+        words = array.array("Q", data)
+        if sys.byteorder == "big":
+            words.byteswap()
+        buffer = words.tolist()[offset:]
+        buffer.reverse()
+        self._end = (block + 1) * BATCH
+        self._buffer = buffer
+
+    def next64(self) -> int:
+        """The next 64-bit word of the stream."""
+        if not self._buffer:
+            self._refill()
+        return self._buffer.pop()
+
+    def below(self, n: int) -> int:
+        """
+        A number in range(n) from a single word (multiply-shift, no
+        rejection loop; the bias is below n / 2**64).
+        """
+        if not self._buffer:
+            self._refill()
+        return (self._buffer.pop() * n) >> 64
+
+    def split(self, *ns: int) -> List[int]:
+        """
+        One number in range(n) for each n, all cut from a SINGLE word
+        (64 // len(ns) bits each). Used where several small draws are
+        needed at once, e.g. orientation, x and y of a placement try.
+        """
+        bits = 64 // len(ns)
+        mask = (1 << bits) - 1
+        word = self.next64()
+        out = []
+        for n in ns:
+            out.append(((word & mask) * n) >> bits)
+            word >>= bits
+        return out
+
+    def random(self) -> float:
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k: int) -> int:
+        if k <= 64:
+            return self.next64() >> (64 - k)
+        result = 0
+        for _ in range((k + 63) // 64):
+            result = (result << 64) | self.next64()
+        return result >> (-k % 64)
+
+    def getstate(self):
+        return (self.master_seed, self.game_id, self.counter)
+
+    def setstate(self, state) -> None:
+        self.reseed(*state)
+
+    def save_data(self) -> dict:
+        return {"seed": self.master_seed, "game_id": self.game_id, "counter": self.counter}
+
+    @staticmethod
+    def load_data(data: dict) -> "StreamRandom":
+        return StreamRandom(data["seed"], data["game_id"], data.get("counter", 0))
+
+
+def new_seed() -> int:
+    """A fresh 64-bit master seed from the operating system."""
+    return random.SystemRandom().getrandbits(64) & MASK64
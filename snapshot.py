@@ -0,0 +1,272 @@
+"""
+snapshot.py
+
+Persistent (immutable, structurally shared) board states. It is
+responsible for:
+
+ Representing a board as tuples that are never modified in place, so
+  any number of versions can exist side by side without deep copies.
+ Applying a placement or an attack by returning a NEW snapshot that
+  shares every untouched row, ship and set with its parent. An attack
+  copies one row of the shot grid and at most one ship; the ship-owner
+  grid is shared completely.
+ Converting to and from a mutable Board when the game needs one.
+ Keeping an undo/redo History of snapshots for the GUI.
+
+Cells in the grids are addressed as rows[y][x].
+"""
+from typing import FrozenSet, List, Optional, Tuple
+
+from board import Board, GRID_SIZE, line_coords
+from ship import Ship
+import zobrist
+
+# Values stored in the shot grid
+UNTOUCHED = 0
+MISS = 1
+HIT = 2
+
+# Value stored in the owner grid for a cell without a ship
+NO_SHIP = -1
+
+_EMPTY_OWNERS = tuple((NO_SHIP,) * GRID_SIZE for _ in range(GRID_SIZE))
+_EMPTY_SHOTS = tuple((UNTOUCHED,) * GRID_SIZE for _ in range(GRID_SIZE))
+
+
+def _replace(row: tuple, index: int, value) -> tuple:
+    """Return a copy of 'row' with one element changed."""
+    return row[:index] + (value,) + row[index + 1:]
+
+
+class ShipSnapshot:
+    """Immutable version of Ship."""
+
+    __slots__ = ("name", "size", "symbol", "coordinates", "hits")
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        symbol: str,
+        coordinates: Tuple[Tuple[int, int], ...],
+        hits: FrozenSet[Tuple[int, int]] = frozenset(),
+    ):
+        self.name = name
+        self.size = size
+        self.symbol = symbol
+        self.coordinates = coordinates
+        self.hits = hits
+
+    def __repr__(self) -> str:
+        return (
+            f"ShipSnapshot(name={self.name!r}, coordinates={self.coordinates!r}, "
+            f"hits={set(self.hits)!r})"
+        )
+
+    def is_sunk(self) -> bool:
+        return len(self.hits) >= self.size
+
+    def with_hit(self, pos: Tuple[int, int]) -> "ShipSnapshot":
+        return ShipSnapshot(
+            self.name, self.size, self.symbol, self.coordinates, self.hits | {pos}
+        )
+
+    @staticmethod
+    def from_ship(ship: Ship) -> "ShipSnapshot":
+        return ShipSnapshot(
+            ship.name,
+            ship.size,
+            ship.symbol,
+            tuple(tuple(c) for c in ship.coordinates),
+            frozenset(tuple(h) for h in ship.hits),
+        )
+
+    def to_ship(self) -> Ship:
+        return Ship(
+            self.name, self.size, self.symbol, list(self.coordinates), set(self.hits)
+        )
+
+
+class BoardSnapshot:
+    """
+    One immutable version of a board.
+
+    ships  : tuple of ShipSnapshot, in placement order
+    owners : rows of ship indexes (NO_SHIP for water)
+    shots  : rows of UNTOUCHED / MISS / HIT
+    afloat : number of ship cells not hit yet, so all_sunk() is O(1)
+    zhash  : Zobrist hash, equal to Board.zhash for the same position
+    """
+
+    __slots__ = ("ships", "owners", "shots", "afloat", "zhash")
+
+    def __init__(
+        self, ships=(), owners=_EMPTY_OWNERS, shots=_EMPTY_SHOTS, afloat=0, zhash=0
+    ):
+        self.ships: Tuple[ShipSnapshot, ...] = ships
+        self.owners: Tuple[Tuple[int, ...], ...] = owners
+        self.shots: Tuple[Tuple[int, ...], ...] = shots
+        self.afloat = afloat
+        self.zhash = zhash
+
+    # ---------------- queries ----------------
+
+    def ship_at(self, x: int, y: int) -> Optional[ShipSnapshot]:
+        index = self.owners[y][x]
+        return None if index == NO_SHIP else self.ships[index]
+
+    def shot_at(self, x: int, y: int) -> int:
+        return self.shots[y][x]
+
+    def all_sunk(self) -> bool:
+        return self.afloat == 0
+
+    # ---------------- new versions ----------------
+
+    def place(
+        self, ship: ShipSnapshot, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Optional["BoardSnapshot"]:
+        """
+        Return a snapshot with 'ship' placed from start to end,
+        or None if the placement breaks the rules (same rules as Board).
+        Only the owner rows the ship lies on are copied.
+        """
+        coords = line_coords(start, end, ship.size)
+        if coords is None:
+            return None
+        for x, y in coords:
+            if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+                return None
+            if self.owners[y][x] != NO_SHIP:
+                return None
+
+        index = len(self.ships)
+        owners = list(self.owners)
+        for x, y in coords:
+            owners[y] = _replace(owners[y], x, index)
+
+        placed = ShipSnapshot(ship.name, ship.size, ship.symbol, tuple(coords), ship.hits)
+        return BoardSnapshot(
+            self.ships + (placed,),
+            tuple(owners),
+            self.shots,
+            self.afloat + ship.size - len(ship.hits),
+            self.zhash ^ zobrist.ship_hash(ship.symbol, coords),
+        )
+
+    def attack(self, x: int, y: int) -> Tuple["BoardSnapshot", str]:
+        """
+        Return (new snapshot, result) with the same results as
+        Board.register_attack. A repeat, or "invalid" for a cell off the
+        board, returns this snapshot unchanged.
+        """
+        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+            return self, "invalid"
+        if self.shots[y][x] != UNTOUCHED:
+            return self, "repeat"
+
+        shots = list(self.shots)
+        index = self.owners[y][x]
+        if index == NO_SHIP:
+            shots[y] = _replace(shots[y], x, MISS)
+            snap = BoardSnapshot(
+                self.ships, self.owners, tuple(shots), self.afloat,
+                self.zhash ^ zobrist.MISS_KEYS[(x, y)],
+            )
+            return snap, "miss"
+
+        shots[y] = _replace(shots[y], x, HIT)
+        ship = self.ships[index].with_hit((x, y))
+        ships = _replace(self.ships, index, ship)
+        snap = BoardSnapshot(
+            ships, self.owners, tuple(shots), self.afloat - 1,
+            self.zhash ^ zobrist.HIT_KEYS[(x, y)],
+        )
+        if ship.is_sunk():
+            return snap, f"sunk:{ship.name}:{ship.symbol}"
+        return snap, "hit"
+
+    # ---------------- conversion ----------------
+
+    @staticmethod
+    def from_board(board: Board) -> "BoardSnapshot":
+        owners = [list(row) for row in _EMPTY_OWNERS]
+        shots = [list(row) for row in _EMPTY_SHOTS]
+        ships = []
+        afloat = 0
+        for index, ship in enumerate(board.ships):
+            snap = ShipSnapshot.from_ship(ship)
+            for x, y in snap.coordinates:
+                owners[y][x] = index
+            afloat += len(snap.coordinates) - len(snap.hits)
+            ships.append(snap)
+        for x, y in board.hits:
+            shots[y][x] = HIT
+        for x, y in board.misses:
+            shots[y][x] = MISS
+        return BoardSnapshot(
+            tuple(ships),
+            tuple(tuple(row) for row in owners),
+            tuple(tuple(row) for row in shots),
+            afloat,
+            board.zhash,
+        )
+
+    def to_board(self) -> Board:
+        # The snapshot already knows every ship's cells and the hash, so
+        # the Board's index is filled in directly instead of reindex().
+        board = Board()
+        board.ships = [s.to_ship() for s in self.ships]
+        for index, ship in enumerate(self.ships):
+            for pos in ship.coordinates:
+                board.owner[pos] = index
+            board.ships_left += not ship.is_sunk()
+        if self.shots is not _EMPTY_SHOTS:
+            for y, row in enumerate(self.shots):
+                for x, value in enumerate(row):
+                    if value == HIT:
+                        board.hits.add((x, y))
+                    elif value == MISS:
+                        board.misses.add((x, y))
+        board.zhash = self.zhash
+        return board
+
+
+class History:
+    """
+    Undo/redo stack of snapshots. Because snapshots share structure,
+    keeping every version costs only the cells that changed.
+    """
+
+    def __init__(self, initial: BoardSnapshot):
+        self._undo: List[BoardSnapshot] = [initial]
+        self._redo: List[BoardSnapshot] = []
+
+    @property
+    def current(self) -> BoardSnapshot:
+        return self._undo[-1]
+
+    def push(self, snap: BoardSnapshot) -> None:
+        """Record a new version; this clears anything that could be redone."""
+        self._undo.append(snap)
+        self._redo.clear()
+
+    def can_undo(self) -> bool:
+        return len(self._undo) > 1
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> Optional[BoardSnapshot]:
+        """Step back one version and return it, or None at the start."""
+        if not self.can_undo():
+            return None
+        self._redo.append(self._undo.pop())
+        return self.current
+
+    def redo(self) -> Optional[BoardSnapshot]:
+        """Step forward one version and return it, or None at the end."""
+        if not self._redo:
+            return None
+        self._undo.append(self._redo.pop())
+        return self.current
@@ -0,0 +1,281 @@
+"""
+state_loader.py
+
+Validating loader for saved games. It is responsible for:
+
+ Checking a whole saved state in one pass before any of it is used:
+  cells that are [x, y] pairs of ints on the board, exactly one ship of
+  each type with the right size and symbol, straight unbroken ship
+  lines, no overlaps, ship hits that are a subset of the ship's cells
+  AND appear in the board hits, board hits that land on a ship, misses
+  that do not, a legal "current", "mode", "rng" and "players".
+ Building each Board's occupancy index and Zobrist hash during that same
+  pass, while leaving the ships as raw dicts. Ship objects are only
+  created the first time board.ships is used.
+ Reporting the first problem found as a StateError whose 'where' names
+  the exact field, e.g. boards[1].ships[2].hits[0].
+
+Run : python state_loader.py saves.jsonl [more ...]   (bulk check)
+"""
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from board import Board, GRID_SIZE, line_coords
+import zobrist
+
+
+class StateError(ValueError):
+    """A saved state failed validation."""
+
+    def __init__(self, where: str, problem: str):
+        super().__init__(f"{where}: {problem}")
+        self.where = where
+        self.problem = problem
+
+
+class LoadedState:
+    """Result of load_state(): everything GameManager needs."""
+
+    def __init__(
+        self,
+        current: int,
+        mode: Optional[str],
+        boards: List[Board],
+        moves: List[list],
+        rng: Optional[dict] = None,
+        players: Sequence[Optional[str]] = (None, None),
+    ):
+        self.current = current
+        self.mode = mode
+        self.boards = boards
+        self.moves = moves
+        self.rng = rng
+        self.players = players
+
+
+# Every legal cell; a saved [x, y] of two ints is valid exactly when
+# tuple([x, y]) is here (1.0 or True would also match, so types are
+# checked separately)
+_CELLS = frozenset((x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE))
+
+
+def _bad_cell(value, where: str) -> StateError:
+    return StateError(where, f"{value!r} is not a cell of the {GRID_SIZE}x{GRID_SIZE} board")
+
+
+def _cell(value, where: str) -> Tuple[int, int]:
+    """Check one [x, y] pair of ints and return it as a tuple."""
+    if (type(value) not in (list, tuple) or len(value) != 2
+            or type(value[0]) is not int or type(value[1]) is not int):
+        raise _bad_cell(value, where)
+    pos = tuple(value)
+    if pos not in _CELLS:
+        raise _bad_cell(value, where)
+    return pos
+
+
+def _cells(values: list, where: str) -> List[Tuple[int, int]]:
+    """
+    Check a list of [x, y] pairs of ints. The error path is only built
+    when a cell is bad, so the common case is one comprehension that
+    drops non-int pairs and one set lookup per cell.
+    """
+    try:
+        cells = [(x, y) for x, y in values if type(x) is int and type(y) is int]
+        ok = len(cells) == len(values) and _CELLS.issuperset(cells)
+    except (TypeError, ValueError):
+        ok = False
+    if not ok:
+        if not isinstance(values, list):
+            raise StateError(where, f"expected a list, got {type(values).__name__}")
+        for i, value in enumerate(values):
+            _cell(value, f"{where}[{i}]")
+    return cells
+
+
+def _bad_ship(ship: dict, where: str, seen_names, size: int, symbol: str) -> None:
+    """Raise the StateError for a ship whose name, size or symbol is wrong."""
+    name = ship["name"]
+    if name in seen_names:
+        raise StateError(f"{where}.name", f"a second {name}")
+    if ship.get("size") != size:
+        raise StateError(f"{where}.size", f"a {name} has size {size}, not {ship.get('size')!r}")
+    raise StateError(f"{where}.symbol", f"a {name} has symbol {symbol!r}, not {ship.get('symbol')!r}")
+
+
+def _list(data: dict, key: str, where: str) -> list:
+    value = data.get(key, [])
+    if not isinstance(value, list):
+        raise StateError(f"{where}.{key}", f"expected a list, got {type(value).__name__}")
+    return value
+
+
+def load_board(data, where: str, ship_types: Sequence[Tuple[str, int, str]]) -> Board:
+    """Validate one saved board and return it with its ships left lazy."""
+    if not isinstance(data, dict):
+        raise StateError(where, f"expected an object, got {type(data).__name__}")
+
+    hit_list = _cells(_list(data, "hits", where), f"{where}.hits")
+    hits = set(hit_list)
+    if len(hits) != len(hit_list):
+        raise StateError(f"{where}.hits", "a cell is listed twice")
+
+    miss_list = _cells(_list(data, "misses", where), f"{where}.misses")
+    misses = set(miss_list)
+    if len(misses) != len(miss_list):
+        raise StateError(f"{where}.misses", "a cell is listed twice")
+    if not hits.isdisjoint(misses):
+        raise StateError(f"{where}.misses", f"{min(hits & misses)} is also a hit")
+
+    types = {name: (size, symbol) for name, size, symbol in ship_types}
+    seen_names = set()
+    owner = {}
+    ships_left = 0
+    h = 0
+    ships = _list(data, "ships", where)
+
+    for index, ship in enumerate(ships):
+        if not isinstance(ship, dict):
+            raise StateError(f"{where}.ships[{index}]",
+                             f"expected an object, got {type(ship).__name__}")
+        name = ship.get("name")
+        try:
+            size, symbol = types[name]
+        except (KeyError, TypeError):
+            raise StateError(f"{where}.ships[{index}].name",
+                             f"unknown ship type {name!r}") from None
+        if (name in seen_names or ship.get("size") != size
+                or ship.get("symbol") != symbol):
+            _bad_ship(ship, f"{where}.ships[{index}]", seen_names, size, symbol)
+        seen_names.add(name)
+
+        coords = ship.get("coordinates")
+        cells = _cells(coords, f"{where}.ships[{index}].coordinates")
+        for pos in cells:
+            other = owner.setdefault(pos, index)
+            if other != index:
+                raise StateError(f"{where}.ships[{index}].coordinates",
+                                 f"{pos} overlaps ships[{other}]")
+        if len(cells) != size or line_coords(cells[0], cells[-1], size) != cells:
+            raise StateError(f"{where}.ships[{index}].coordinates",
+                             f"not a straight line of {size} cells")
+        h ^= zobrist.ship_hash(symbol, cells)
+
+        ship_hits = set(_cells(ship.get("hits", []), f"{where}.ships[{index}].hits"))
+        if not ship_hits.issubset(cells):
+            raise StateError(f"{where}.ships[{index}].hits",
+                             f"{min(ship_hits.difference(cells))} is not one of this ship's cells")
+        if not ship_hits.issubset(hits):
+            raise StateError(f"{where}.ships[{index}].hits",
+                             f"{min(ship_hits - hits)} is missing from {where}.hits")
+        ships_left += len(ship_hits) < size
+        for pos in cells:
+            if pos in hits and pos not in ship_hits:
+                raise StateError(f"{where}.ships[{index}].hits", f"board hit {pos} is missing")
+            if pos in misses:
+                raise StateError(f"{where}.misses", f"{pos} is on ships[{index}]")
+
+    if len(seen_names) != len(types):
+        missing = [name for name in types if name not in seen_names]
+        raise StateError(f"{where}.ships", f"the fleet has no {', '.join(missing)}")
+
+    hit_keys = zobrist.HIT_KEYS
+    for pos in hits:
+        if pos not in owner:
+            raise StateError(f"{where}.hits", f"{pos} is a hit on open water")
+        h ^= hit_keys[pos]
+    miss_keys = zobrist.MISS_KEYS
+    for pos in misses:
+        h ^= miss_keys[pos]
+
+    board = Board()
+    board._ship_data = ships
+    board.hits = hits
+    board.misses = misses
+    board.owner = owner
+    board.ships_left = ships_left
+    board.zhash = h
+    return board
+
+
+def load_state(
+    data,
+    ship_types: Sequence[Tuple[str, int, str]],
+    modes: Sequence[str] = (),
+) -> LoadedState:
+    """
+    Validate a whole saved state (as returned by FileManager.load_state)
+    and build its boards. Raises StateError on the first problem.
+    'modes' lists the accepted game modes; empty accepts any string.
+    """
+    if not isinstance(data, dict):
+        raise StateError("state", f"expected an object, got {type(data).__name__}")
+
+    current = data.get("current", 0)
+    if current not in (0, 1) or type(current) is not int:
+        raise StateError("current", f"must be 0 or 1, got {current!r}")
+
+    mode = data.get("mode")
+    if mode is not None and (not isinstance(mode, str) or (modes and mode not in modes)):
+        raise StateError("mode", f"unknown game mode {mode!r}")
+
+    boards = _list(data, "boards", "state")
+    if len(boards) != 2:
+        raise StateError("boards", f"expected 2 boards, got {len(boards)}")
+    loaded = [load_board(bd, f"boards[{i}]", ship_types) for i, bd in enumerate(boards)]
+
+    moves = []
+    for i, move in enumerate(_list(data, "moves", "state")):
+        if (not isinstance(move, list) or len(move) != 3
+                or type(move[0]) is not int or move[0] not in (0, 1)):
+            raise StateError(f"moves[{i}]", f"expected [attacker, x, y], got {move!r}")
+        _cell(move[1:], f"moves[{i}]")
+        moves.append(move)
+
+    rng = data.get("rng")
+    if rng is not None:
+        if not isinstance(rng, dict):
+            raise StateError("rng", f"expected an object, got {type(rng).__name__}")
+        for key in ("seed", "game_id", "counter"):
+            value = rng.get(key)
+            if type(value) is not int or value < 0:
+                raise StateError(f"rng.{key}", f"expected a non-negative integer, got {value!r}")
+
+    players = data.get("players", [None, None])
+    if (not isinstance(players, list) or len(players) != 2
+            or not all(p is None or isinstance(p, str) for p in players)):
+        raise StateError("players", f"expected two names or nulls, got {players!r}")
+
+    return LoadedState(current, mode, loaded, moves, rng, players)
+
+
+def main(argv: List[str]) -> int:
+    import json
+    from analytics import iter_lines
+    from game_manager import SHIP_TYPES, CLASSIC, SALVO
+
+    if not argv:
+        print("usage: python state_loader.py FILE [FILE ...]")
+        return 2
+
+    checked = bad = 0
+    started = time.perf_counter()
+    for path in argv:
+        for number, line in enumerate(iter_lines(path), 1):
+            checked += 1
+            try:
+                load_state(json.loads(line), SHIP_TYPES, (CLASSIC, SALVO))
+            except ValueError as e:
+                bad += 1
+                print(f"{path}:{number}: {e}")
+    elapsed = time.perf_counter() - started
+
+    rate = checked / elapsed if elapsed > 0 else 0.0
+    print(f"Checked {checked} saves, {bad} invalid, in {elapsed:.2f}s ({rate:.0f} saves/s)",
+          file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
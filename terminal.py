@@ -0,0 +1,436 @@
+"""
+terminal.py
+
+Curses frontend for machines without Tk (e.g. playing over SSH).
+It offers the same game as main.BattleshipGUI and uses the same
+GameManager for placement, turns, attacks and save/load.
+
+Drawing is diff-based: every character cell written to the screen is
+remembered in a shadow copy, and a cell is only written again when its
+text or colour changes. After a shot usually just two cells (the target
+and the cursor) and the status line are sent over the link. Boards
+larger than the terminal are shown through a viewport that scrolls
+with the cursor.
+
+Run : python terminal.py
+
+Keys: arrows / hjkl move, Enter selects or fires, Space queues a salvo
+shot, f fires the salvo, Tab shows your own board, p passes the device,
+w saves and quits, u / y undo / redo during manual placement, q quits.
+"""
+import curses
+from typing import Dict, Optional, Tuple
+
+from board import Board, GRID_SIZE, column_label
+from game_manager import gm, CLASSIC, SALVO, SHIP_TYPES
+from snapshot import History, ShipSnapshot
+
+# Screen layout
+TOP = 3       # title + message + column labels
+LEFT = 4      # row labels
+BOTTOM = 1    # status line
+# Characters per board cell: the widest column label plus a space
+CELL_W = len(column_label(GRID_SIZE - 1)) + 1
+
+_MOVES = {
+    curses.KEY_UP: (0, -1), ord("k"): (0, -1),
+    curses.KEY_DOWN: (0, 1), ord("j"): (0, 1),
+    curses.KEY_LEFT: (-1, 0), ord("h"): (-1, 0),
+    curses.KEY_RIGHT: (1, 0), ord("l"): (1, 0),
+}
+_ENTER = (curses.KEY_ENTER, 10, 13)
+
+# Colour pair numbers
+WATER, HIT, MISS, SHIP, START, LEGAL, QUEUED = range(1, 8)
+
+
+class TerminalGame:
+    def __init__(self, scr):
+        self.scr = scr
+        # (row, col) -> (text, attr) last written there
+        self.shadow: Dict[Tuple[int, int], Tuple[str, int]] = {}
+        self.cursor = (0, 0)
+        # Top-left board cell shown in the viewport
+        self.view = (0, 0)
+        self.message = ""
+
+        curses.curs_set(0)
+        self.scr.keypad(True)
+        if curses.has_colors():
+            curses.start_color()
+            curses.use_default_colors()
+            curses.init_pair(WATER, curses.COLOR_CYAN, -1)
+            curses.init_pair(HIT, curses.COLOR_RED, -1)
+            curses.init_pair(MISS, curses.COLOR_BLUE, -1)
+            curses.init_pair(SHIP, curses.COLOR_WHITE, -1)
+            curses.init_pair(START, curses.COLOR_BLACK, curses.COLOR_RED)
+            curses.init_pair(LEGAL, curses.COLOR_BLACK, curses.COLOR_GREEN)
+            curses.init_pair(QUEUED, curses.COLOR_BLACK, curses.COLOR_YELLOW)
+
+    # ---------------- low-level drawing ----------------
+
+    def put(self, row: int, col: int, text: str, attr: int = 0) -> None:
+        """Write text at (row, col) unless the shadow says it is already there."""
+        key = (row, col)
+        if self.shadow.get(key) == (text, attr):
+            return
+        h, w = self.scr.getmaxyx()
+        if row >= h or col >= w:
+            return
+        try:
+            self.scr.addstr(row, col, text[:w - col], attr)
+        except curses.error:
+            # Writing the bottom-right corner raises after drawing
+            pass
+        self.shadow[key] = (text, attr)
+
+    def line(self, row: int, text: str, attr: int = 0) -> None:
+        """Write a full-width line (padded so old text is overwritten)."""
+        w = self.scr.getmaxyx()[1]
+        self.put(row, 0, text.ljust(w - 1)[:w - 1], attr)
+
+    def clear(self) -> None:
+        """Start a new screen: erase everything and forget the shadow."""
+        self.scr.erase()
+        self.shadow.clear()
+
+    def ask(self, row: int, prompt: str, default: str = "") -> Optional[str]:
+        """
+        Read one line of text after 'prompt' (Enter accepts, Esc cancels).
+        Returns None when cancelled.
+        """
+        text = default
+        curses.curs_set(1)
+        try:
+            while True:
+                self.line(row, prompt + text)
+                self.scr.move(row, min(len(prompt + text), self.scr.getmaxyx()[1] - 2))
+                ch = self.key()
+                if ch in _ENTER:
+                    return text
+                if ch == 27:
+                    return None
+                if ch in (curses.KEY_BACKSPACE, 127, 8):
+                    text = text[:-1]
+                elif 32 <= ch < 127 and len(text) < 24:
+                    text += chr(ch)
+        finally:
+            curses.curs_set(0)
+
+    def ask_player_names(self) -> bool:
+        """Name both players for the opponent model. False if cancelled."""
+        self.clear()
+        self.line(0, "Player names (blank plays without learning, Esc cancels)", curses.A_BOLD)
+        names = []
+        for p in range(2):
+            name = self.ask(2 + p, f"Player {p + 1}: ", gm.player_names[p] or "")
+            if name is None:
+                return False
+            names.append(name.strip() or None)
+        gm.set_players(*names)
+        return True
+
+    def key(self) -> int:
+        self.scr.refresh()
+        ch = self.scr.getch()
+        if ch == curses.KEY_RESIZE:
+            self.clear()
+        return ch
+
+    # ---------------- board drawing ----------------
+
+    def viewport(self) -> Tuple[int, int]:
+        """Number of board columns and rows that fit on screen."""
+        h, w = self.scr.getmaxyx()
+        cols = max(1, min(GRID_SIZE, (w - LEFT) // CELL_W))
+        rows = max(1, min(GRID_SIZE, h - TOP - BOTTOM))
+        return cols, rows
+
+    def scroll_to_cursor(self) -> None:
+        cols, rows = self.viewport()
+        vx, vy = self.view
+        cx, cy = self.cursor
+        vx = min(max(vx, cx - cols + 1), cx)
+        vy = min(max(vy, cy - rows + 1), cy)
+        self.view = (vx, vy)
+
+    def glyph(self, board: Board, pos: Tuple[int, int], show_ships: bool) -> Tuple[str, int]:
+        if pos in board.hits:
+            return "X", curses.color_pair(HIT) | curses.A_BOLD
+        if pos in board.misses:
+            return "o", curses.color_pair(MISS)
+        index = board.owner.get(pos)
+        if index is not None:
+            ship = board.ships[index]
+            if show_ships or ship.is_sunk():
+                return ship.symbol, curses.color_pair(SHIP) | curses.A_BOLD
+        return "~", curses.color_pair(WATER)
+
+    def draw_board(self, board: Board, show_ships: bool, marks=None) -> None:
+        """
+        Draw the visible part of 'board'. 'marks' maps cells to a colour
+        pair used as background (legal ends, queued shots, ...).
+        """
+        marks = marks or {}
+        self.scroll_to_cursor()
+        cols, rows = self.viewport()
+        vx, vy = self.view
+
+        for i in range(cols):
+            x = vx + i
+            self.put(TOP - 1, LEFT + i * CELL_W, column_label(x).ljust(CELL_W))
+        for j in range(rows):
+            y = vy + j
+            row = TOP + j
+            self.put(row, 0, f"{y + 1:>3} ")
+            for i in range(cols):
+                x = vx + i
+                pos = (x, y)
+                ch, attr = self.glyph(board, pos, show_ships)
+                if pos in marks:
+                    attr = curses.color_pair(marks[pos])
+                if pos == self.cursor:
+                    attr |= curses.A_REVERSE
+                self.put(row, LEFT + i * CELL_W, ch.ljust(CELL_W), attr)
+
+    def status(self, text: str) -> None:
+        h = self.scr.getmaxyx()[0]
+        self.line(h - 1, text, curses.A_REVERSE)
+
+    def move_cursor(self, ch: int) -> bool:
+        if ch not in _MOVES:
+            return False
+        dx, dy = _MOVES[ch]
+        x, y = self.cursor
+        self.cursor = (min(max(x + dx, 0), GRID_SIZE - 1),
+                       min(max(y + dy, 0), GRID_SIZE - 1))
+        return True
+
+    # ---------------- screens ----------------
+
+    def run(self) -> None:
+        while True:
+            self.clear()
+            self.line(0, "Battleship (Arctic Fleet)", curses.A_BOLD)
+            self.line(2, "n  Start New Game")
+            self.line(3, "s  Start Salvo Game")
+            self.line(4, "l  Load previous game")
+            self.line(5, "q  Quit")
+            self.line(7, self.message)
+            ch = self.key()
+            if ch == ord("q"):
+                return
+            if ch in (ord("n"), ord("s")):
+                if not self.ask_player_names():
+                    continue
+                gm.reset(SALVO if ch == ord("s") else CLASSIC)
+                if (self.place_fleet(0) and self.pass_device(1)
+                        and self.place_fleet(1) and self.pass_device(0)):
+                    gm.current = 0
+                    self.play()
+            elif ch == ord("l"):
+                try:
+                    data = gm.load_state()
+                except ValueError as e:
+                    self.message = f"Failed to load saved game: {e}"
+                    continue
+                if data is None:
+                    self.message = "No saved game found."
+                else:
+                    self.message = ""
+                    self.play()
+
+    def pass_device(self, player: int) -> bool:
+        self.clear()
+        while True:
+            # Redrawn every pass: key() clears the screen on a resize
+            self.line(0, f"Pass the device to Player {player + 1}.", curses.A_BOLD)
+            self.line(2, "Press any key when ready (q to quit).")
+            ch = self.key()
+            if ch != curses.KEY_RESIZE:
+                return ch != ord("q")
+
+    def place_fleet(self, player: int) -> bool:
+        """Random or manual placement for one player. False if the player quit."""
+        self.clear()
+        while True:
+            self.line(0, f"Player {player + 1}: (r)andom or (m)anual placement?", curses.A_BOLD)
+            ch = self.key()
+            if ch == ord("q"):
+                return False
+            if ch == ord("r"):
+                gm.place_all_ships_random(player)
+                return True
+            if ch == ord("m"):
+                return self.place_manual(player)
+
+    def place_manual(self, player: int) -> bool:
+        history = History(gm.snapshot(player))
+        start: Optional[Tuple[int, int]] = None
+        ends = []
+        self.cursor = (0, 0)
+        self.clear()
+
+        while True:
+            board = gm.get_board(player)
+            index = len(board.ships)
+            if index >= len(SHIP_TYPES):
+                return True
+            name, size, sym = SHIP_TYPES[index]
+
+            marks = {end: LEGAL for end in ends}
+            if start is not None:
+                marks[start] = START
+            self.line(0, f"Player {player + 1} placing: {name} (size {size}) symbol {sym}",
+                      curses.A_BOLD)
+            self.line(1, self.message)
+            self.draw_board(board, show_ships=True, marks=marks)
+            self.status("Enter: start/end  u/y: undo/redo  q: quit")
+
+            ch = self.key()
+            if ch == curses.KEY_RESIZE:
+                continue
+            self.message = ""
+            if self.move_cursor(ch):
+                continue
+            if ch == ord("q"):
+                return False
+            if ch in (ord("u"), ord("y")):
+                snap = history.undo() if ch == ord("u") else history.redo()
+                if snap is not None:
+                    gm.restore(player, snap)
+                start, ends = None, []
+            elif ch in _ENTER:
+                if start is None:
+                    ends = board.legal_ends(self.cursor, size)
+                    if ends:
+                        start = self.cursor
+                    else:
+                        self.message = f"The {name} does not fit from that cell."
+                elif self.cursor in ends:
+                    gm.place_ship_manual(player, name, start, self.cursor)
+                    history.push(history.current.place(
+                        ShipSnapshot(name, size, sym, ()), start, self.cursor))
+                    start, ends = None, []
+                else:
+                    start, ends = None, []
+
+    def play(self) -> None:
+        """Turn loop until someone wins, the game is saved, or the player quits."""
+        while True:
+            if not self.turn():
+                return
+            winner = 2 if gm.all_sunk(0) else 1 if gm.all_sunk(1) else 0
+            if winner:
+                # Archive the finished game for analytics.py
+                gm.save_record()
+                self.message = f"Player {winner} wins!"
+                return
+            gm.current = 1 - gm.current
+            if not self.pass_device(gm.current):
+                return
+
+    def turn(self) -> bool:
+        """
+        One player's turn. Returns True when the turn ended normally,
+        False when the player saved or quit.
+        """
+        attacker = gm.current
+        defender = 1 - attacker
+        attacked = False
+        confirm_pass = False
+        own_view = False
+        queue = []
+        self.cursor = (0, 0)
+        self.view = (0, 0)
+        self.clear()
+
+        while True:
+            title = f"Player {attacker + 1}'s Turn - " + ("your board" if own_view else "opponent view")
+            self.line(0, title, curses.A_BOLD)
+            self.line(1, self.message)
+            if own_view:
+                self.draw_board(gm.get_board(attacker), show_ships=True)
+            else:
+                self.draw_board(gm.get_board(defender), show_ships=False,
+                                marks={pos: QUEUED for pos in queue})
+            if gm.mode == SALVO:
+                self.status(f"Space: queue ({len(queue)}/{gm.salvo_size(attacker)})  "
+                            "f: fire  Tab: view  p: pass  w: save+quit")
+            else:
+                self.status("Enter: fire  Tab: view  p: pass  w: save+quit")
+
+            ch = self.key()
+            if ch == curses.KEY_RESIZE or self.move_cursor(ch):
+                continue
+            self.message = ""
+            if ch == ord("p"):
+                if attacked or confirm_pass:
+                    return True
+                self.message = "You have not attacked. Press p again to end anyway."
+                confirm_pass = True
+                continue
+            # Any other key cancels a pending "end turn anyway?"
+            confirm_pass = False
+            if ch == ord("\t"):
+                own_view = not own_view
+                self.clear()
+            elif ch == ord("q"):
+                return False
+            elif ch == ord("w"):
+                gm.save_state()
+                self.message = "Game saved."
+                return False
+            elif own_view or attacked:
+                continue
+            elif gm.mode == CLASSIC and ch in _ENTER:
+                result = gm.register_attack(defender, *self.cursor)
+                if result == "repeat":
+                    self.message = "Already attacked there."
+                    continue
+                self.message = describe(result)
+                attacked = True
+                if gm.all_sunk(defender):
+                    return True
+            elif gm.mode == SALVO and ch == ord(" "):
+                board = gm.get_board(defender)
+                if self.cursor in board.hits or self.cursor in board.misses:
+                    self.message = "Already attacked there."
+                elif self.cursor in queue:
+                    queue.remove(self.cursor)
+                elif len(queue) < gm.salvo_size(attacker):
+                    queue.append(self.cursor)
+                else:
+                    self.message = "No shots left this turn. Press f to fire."
+            elif gm.mode == SALVO and ch == ord("f") and queue:
+                outcome = gm.register_salvo(defender, queue)
+                results = outcome["results"]
+                hits = sum(1 for r in results if r == "hit" or r.startswith("sunk:"))
+                self.message = f"{hits} hit(s), {results.count('miss')} miss(es). " + " ".join(
+                    f"You sunk the enemy {name}!" for name in outcome["sunk"])
+                queue = []
+                attacked = True
+                if gm.all_sunk(defender):
+                    return True
+
+
+def describe(result: str) -> str:
+    """Human-readable text for a result from register_attack."""
+    if result == "miss":
+        return "Miss."
+    if result == "hit":
+        return "Hit!"
+    if result.startswith("sunk:"):
+        return f"You sunk the enemy {result.split(':')[1]}!"
+    return result
+
+
+def main(scr) -> None:
+    try:
+        TerminalGame(scr).run()
+    finally:
+        gm.flush_models()
+
+
+if __name__ == "__main__":
+    curses.wrapper(main)
@@ -0,0 +1,81 @@
+"""
+zobrist.py
+
+64-bit Zobrist keys for board positions.
+
+Every (ship symbol, cell), hit cell and miss cell has a fixed
+pseudo-random 64-bit key. A board's hash is the XOR of the keys of
+everything on it, so placing a ship or registering an attack updates
+the hash with a few XORs instead of rehashing the whole board.
+
+Keys are derived from the table name and the cell with a SplitMix64
+mixer, so they do not depend on the grid size or on the order cells
+are first used, and hashes are stable across runs and processes.
+"""
+import hashlib
+from typing import Dict, Tuple
+
+MASK64 = (1 << 64) - 1
+
+
+def mix64(z: int) -> int:
+    """SplitMix64 finalizer: scrambles a 64-bit integer."""
+    z = (z + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def _seed(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big")
+
+
+class _KeyTable(dict):
+    """
+    Map (x, y) -> 64-bit key for one kind of feature. Keys are created
+    on first use; after that a lookup is a plain dict lookup.
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.seed = _seed(name)
+
+    def __missing__(self, pos: Tuple[int, int]) -> int:
+        x, y = pos
+        key = self[pos] = mix64(self.seed ^ mix64((x << 32) | y))
+        return key
+
+
+HIT_KEYS = _KeyTable("hit")
+MISS_KEYS = _KeyTable("miss")
+# XORed into a GameManager key when it is Player 2's turn
+TURN_KEY = mix64(_seed("turn"))
+
+# symbol -> per-cell keys for ships with that symbol
+_SHIP_KEYS: Dict[str, _KeyTable] = {}
+
+
+def ship_keys(symbol: str) -> _KeyTable:
+    """Per-cell keys for a ship with the given symbol."""
+    table = _SHIP_KEYS.get(symbol)
+    if table is None:
+        table = _SHIP_KEYS[symbol] = _KeyTable(f"ship:{symbol}")
+    return table
+
+
+def ship_hash(symbol: str, coordinates) -> int:
+    """Combined key of a ship lying on 'coordinates'."""
+    keys = ship_keys(symbol)
+    h = 0
+    for pos in coordinates:
+        h ^= keys[tuple(pos)]
+    return h
+
+
+def combine(h0: int, h1: int, current: int) -> int:
+    """
+    Key for a two-board game. The second board is rotated so that
+    swapping the two boards gives a different key.
+    """
+    rotated = ((h1 << 29) | (h1 >> 35)) & MASK64
+    return h0 ^ rotated ^ (TURN_KEY if current else 0)